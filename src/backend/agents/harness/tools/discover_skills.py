@@ -3,6 +3,7 @@ Skill discovery tools.
 Discovers skills from skills/ directory with configurable search order.
 """
 
+import functools
 from pathlib import Path
 from agno.tools import tool
 import yaml
@@ -24,6 +25,13 @@ def _parse_skill_frontmatter(content: str) -> dict:
     return {}
 
 
+@functools.lru_cache(maxsize=256)
+def _load_skill_metadata(skill_md: str, mtime_ns: int) -> dict:
+    """Read and parse a SKILL.md frontmatter; cached until the file changes."""
+    content = Path(skill_md).read_text(encoding='utf-8')
+    return _parse_skill_frontmatter(content) or {}
+
+
 def _resolve_skill_reference_path(skill_root: Path, ref_path: str) -> tuple[Path | None, bool]:
     """Resolve a reference path and ensure it stays inside the skill root."""
     root = skill_root.resolve()
@@ -76,11 +84,13 @@ def discover_skills(domains: list[str] = None) -> str:
             if not skill_dir.is_dir():
                 continue
             skill_md = skill_dir / "SKILL.md"
-            if not skill_md.exists():
+            try:
+                mtime_ns = skill_md.stat().st_mtime_ns
+            except OSError:
                 continue
-                
-            content = skill_md.read_text(encoding='utf-8')
-            metadata = _parse_skill_frontmatter(content)
+            
+            # Only re-read and re-parse SKILL.md files edited since the last call
+            metadata = _load_skill_metadata(str(skill_md), mtime_ns)
             
             skills.append({
                 "name": metadata.get("name", skill_dir.name),
@@ -2,9 +2,50 @@
 Tavily search and URL extraction tools.
 """
 
+import functools
 import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
 from agno.tools import tool
 
+# Formatted results keyed by tool call arguments. The agent often repeats the
+# same search or extraction across turns of a conversation; each Tavily call
+# is a billed network round trip of a second or more.
+_RESULT_CACHE_TTL_S = 600.0
+_RESULT_CACHE_MAX_ENTRIES = 256
+_result_cache: OrderedDict[tuple, tuple[float, str]] = OrderedDict()
+_result_cache_lock = threading.Lock()
+
+
+@functools.cache
+def _get_client(api_key: str):
+    """One TavilyClient per API key, reused across tool calls."""
+    from tavily import TavilyClient
+    return TavilyClient(api_key=api_key)
+
+
+def _cached_result(key: tuple) -> Optional[str]:
+    with _result_cache_lock:
+        cached = _result_cache.get(key)
+        if cached is None:
+            return None
+        if time.monotonic() - cached[0] >= _RESULT_CACHE_TTL_S:
+            del _result_cache[key]
+            return None
+        _result_cache.move_to_end(key)
+        return cached[1]
+
+
+def _remember_result(key: tuple, result: str) -> None:
+    with _result_cache_lock:
+        _result_cache[key] = (time.monotonic(), result)
+        _result_cache.move_to_end(key)
+        while len(_result_cache) > _RESULT_CACHE_MAX_ENTRIES:
+            _result_cache.popitem(last=False)
+
 
 @tool(
     name="web_search_using_tavily",
@@ -22,14 +63,17 @@ def tavily_search(query: str, max_results: int = 5) -> str:
     Returns:
         Formatted search results
     """
-    from tavily import TavilyClient
-    
     api_key = os.getenv("TAVILY_API_KEY")
     if not api_key:
         return "Error: TAVILY_API_KEY not set in environment"
     
+    cache_key = ("search", query, max_results)
+    cached = _cached_result(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
-        client = TavilyClient(api_key=api_key)
+        client = _get_client(api_key)
         response = client.search(
             query=query,
             search_depth="basic",
@@ -44,7 +88,9 @@ def tavily_search(query: str, max_results: int = 5) -> str:
         for r in response["results"][:max_results]:
             results.append(f"**{r.get('title', 'Untitled')}**\n{r.get('url', '')}\n{r.get('content', '')[:500]}\n")
         
-        return f"## Search Results for: {query}\n\n" + "\n---\n".join(results)
+        formatted = f"## Search Results for: {query}\n\n" + "\n---\n".join(results)
+        _remember_result(cache_key, formatted)
+        return formatted
         
     except Exception as e:
         return f"Error searching: {str(e)}"
@@ -65,18 +111,21 @@ def extract_url_content(url: str) -> str:
     Returns:
         Extracted page content in markdown format
     """
-    from tavily import TavilyClient
-    
     api_key = os.getenv("TAVILY_API_KEY")
     if not api_key:
         return "Error: TAVILY_API_KEY not set in environment"
     
+    # Ensure URL has protocol
+    if not url.startswith("http"):
+        url = f"https://{url}"
+    
+    cache_key = ("extract", url)
+    cached = _cached_result(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
-        client = TavilyClient(api_key=api_key)
-        
-        # Ensure URL has protocol
-        if not url.startswith("http"):
-            url = f"https://{url}"
+        client = _get_client(api_key)
         
         response = client.extract(urls=[url])
         
@@ -85,7 +134,9 @@ def extract_url_content(url: str) -> str:
             content = result.get("raw_content", "")
             
             if content:
-                return f"## Extracted from {url}\n\n{content[:8000]}"  # Limit to 8k chars
+                formatted = f"## Extracted from {url}\n\n{content[:8000]}"  # Limit to 8k chars
+                _remember_result(cache_key, formatted)
+                return formatted
             else:
                 return f"No content extracted from {url}. The page may be blocked or empty."
         else:
@@ -6,6 +6,7 @@ This module handles path configuration and imports from the harness agent.
 """
 
 import sys
+import threading
 from pathlib import Path
 
 # Add harness directory to path for imports
@@ -30,5 +31,23 @@ def create_agent():
     return agent
 
 
+_local = threading.local()
+
+
+def get_agent():
+    """
+    Return this thread's cached harness agent, creating it on first use.
+
+    The agent carries no conversation state (history is passed in with each
+    run), so building the model client and tool registry once per worker
+    thread is enough. It is not shared across threads because `Agent.run`
+    keeps per-run state on the instance and is not safe to call concurrently.
+    """
+    agent = getattr(_local, "agent", None)
+    if agent is None:
+        agent = _local.agent = create_agent()
+    return agent
+
+
 # Export for use by main.py
-__all__ = ["create_agent"]
+__all__ = ["create_agent", "get_agent"]
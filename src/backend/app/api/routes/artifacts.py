@@ -5,22 +5,171 @@ Serves generated files (DOCX, PDF, XLSX, images) for download.
 """
 
 import mimetypes
-from pathlib import Path
+import os
+import re
+import stat
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from urllib.parse import quote
 
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
+import anyio
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, Response
+from starlette.datastructures import Headers
+from starlette.types import Receive, Scope, Send
 
+from app.config import settings
 from app.db.conversations import get_db
 from app.paths import ARTIFACTS_DIR
 
 router = APIRouter(prefix="/api/artifacts", tags=["artifacts"])
 
 # Allowed file extensions for security
-ALLOWED_EXTENSIONS = {'.docx', '.xlsx', '.pdf', '.png', '.jpg', '.jpeg', '.webp', '.csv', '.md', '.txt'}
+ALLOWED_EXTENSIONS = frozenset({'.docx', '.xlsx', '.pdf', '.png', '.jpg', '.jpeg', '.webp', '.csv', '.md', '.txt'})
+
+# Download filenames: word characters, dots and dashes (no separators, no leading
+# dot) ending in one of ALLOWED_EXTENSIONS. \w keeps non-ASCII titles valid, since
+# the artifact tools slugify titles with the same class.
+_SAFE_FILENAME = re.compile(
+    r"\w[\w.-]{0,254}\.(?:docx|xlsx|pdf|png|jpe?g|webp|csv|md|txt)",
+    re.IGNORECASE,
+)
+
+# Directory listings cached per conversation, keyed on the directory mtime.
+# Adding, removing or renaming a file bumps the mtime and invalidates the entry.
+_SCAN_CACHE_MAX_ENTRIES = 1024
+# Skip caching while the directory mtime is this recent: a file created within
+# the same timestamp tick would otherwise leave a stale entry behind.
+_SCAN_CACHE_MIN_AGE_NS = 2_000_000_000
+_scan_cache: OrderedDict[str, tuple[int, list[tuple[str, str, int, float]]]] = OrderedDict()
+_scan_cache_lock = threading.Lock()
+
+# Small artifacts (most .md/.txt) are served from memory: for files this size
+# the open/read/sendfile syscalls cost more than the transfer itself.
+# Range requests skip the cache so FileResponse handles them.
+_SMALL_FILE_MAX_BYTES = 64 * 1024
+_SMALL_CACHE_MAX_BYTES = 64 * 1024 * 1024
+_small_cache: OrderedDict[str, tuple[int, bytes]] = OrderedDict()
+_small_cache_bytes = 0
+_small_cache_lock = threading.Lock()
+
+
+def _suffix(filename: str) -> str:
+    """Lower-cased extension, matching Path.suffix without building a Path."""
+    dot = filename.rfind(".")
+    return filename[dot:].lower() if dot > 0 else ""
+
+
+def _scan_artifacts(conversation_id: str, conv_dir: str) -> list[tuple[str, str, int, float]]:
+    """
+    List allowed artifact files in a conversation directory.
+
+    Returns (filename, type, size_bytes, mtime) tuples. Raises FileNotFoundError
+    if the directory does not exist.
+    """
+    dir_mtime = os.stat(conv_dir).st_mtime_ns
+    with _scan_cache_lock:
+        cached = _scan_cache.get(conversation_id)
+        if cached and cached[0] == dir_mtime:
+            _scan_cache.move_to_end(conversation_id)
+            return cached[1]
+
+    # One scandir pass: DirEntry caches the file type from the directory read
+    entries = []
+    with os.scandir(conv_dir) as it:
+        for entry in it:
+            if not entry.is_file(follow_symlinks=False):
+                continue
+            suffix = _suffix(entry.name)
+            if suffix not in ALLOWED_EXTENSIONS:
+                continue
+            entry_stat = entry.stat(follow_symlinks=False)
+            entries.append((entry.name, suffix[1:], entry_stat.st_size, entry_stat.st_mtime))
+
+    if time.time_ns() - dir_mtime >= _SCAN_CACHE_MIN_AGE_NS:
+        with _scan_cache_lock:
+            _scan_cache[conversation_id] = (dir_mtime, entries)
+            _scan_cache.move_to_end(conversation_id)
+            while len(_scan_cache) > _SCAN_CACHE_MAX_ENTRIES:
+                _scan_cache.popitem(last=False)
+    return entries
+
+
+def _read_small_artifact(path: str, st: os.stat_result) -> bytes:
+    """Return file bytes from the small-file cache, re-reading if mtime or size changed."""
+    global _small_cache_bytes
+    with _small_cache_lock:
+        cached = _small_cache.get(path)
+        if cached and cached[0] == st.st_mtime_ns and len(cached[1]) == st.st_size:
+            _small_cache.move_to_end(path)
+            return cached[1]
+
+    with open(path, "rb") as f:
+        data = f.read()
+
+    with _small_cache_lock:
+        old = _small_cache.pop(path, None)
+        if old:
+            _small_cache_bytes -= len(old[1])
+        _small_cache[path] = (st.st_mtime_ns, data)
+        _small_cache_bytes += len(data)
+        while _small_cache_bytes > _SMALL_CACHE_MAX_BYTES:
+            _, (_, evicted) = _small_cache.popitem(last=False)
+            _small_cache_bytes -= len(evicted)
+    return data
+
+
+def _is_not_modified(request_headers: Headers, st: os.stat_result, etag: str) -> bool:
+    """True when the client's cached copy (If-None-Match / If-Modified-Since) is current."""
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            return int(st.st_mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+class ZeroCopyFileResponse(FileResponse):
+    """
+    FileResponse that hands the open file descriptor to the server when it
+    supports the ASGI `http.response.zerocopysend` extension (kernel sendfile).
+
+    Range and HEAD requests, and servers without the extension, use the regular
+    FileResponse path (which already prefers `http.response.pathsend`).
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            "http.response.zerocopysend" not in scope.get("extensions", {})
+            or scope["method"].upper() == "HEAD"
+            or "range" in Headers(scope=scope)
+        ):
+            await super().__call__(scope, receive, send)
+            return
+
+        if self.stat_result is None:
+            self.set_stat_headers(await anyio.to_thread.run_sync(os.stat, self.path))
+
+        file = await anyio.to_thread.run_sync(open, self.path, "rb")
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            await send({"type": "http.response.zerocopysend", "file": file.fileno(), "more_body": False})
+        finally:
+            await anyio.to_thread.run_sync(file.close)
+
+        if self.background is not None:
+            await self.background()
 
 
 @router.get("/{conversation_id}/{filename}")
-def get_artifact(conversation_id: str, filename: str):
+def get_artifact(conversation_id: str, filename: str, request: Request):
     """
     Download a generated artifact file.
     
@@ -33,7 +182,7 @@ def get_artifact(conversation_id: str, filename: str):
         
     Security:
         - Validates conversation exists
-        - Prevents path traversal attacks
+        - Prevents path traversal attacks (filename must match _SAFE_FILENAME)
         - Only allows specific file extensions
     """
     db = get_db()
@@ -42,20 +191,19 @@ def get_artifact(conversation_id: str, filename: str):
     if not db.conversation_exists(conversation_id):
         raise HTTPException(status_code=404, detail="Conversation not found")
     
-    # Security: Prevent path traversal
-    if ".." in filename or "/" in filename or "\\" in filename:
+    # Security: One pass rejects path separators, dotfiles and disallowed extensions
+    if not _SAFE_FILENAME.fullmatch(filename):
         raise HTTPException(status_code=400, detail="Invalid filename")
     
-    # Security: Check file extension
-    file_ext = Path(filename).suffix.lower()
-    if file_ext not in ALLOWED_EXTENSIONS:
-        raise HTTPException(status_code=400, detail=f"File type not allowed: {file_ext}")
-    
     # Build file path
     file_path = ARTIFACTS_DIR / conversation_id / filename
     
     # Check file exists
-    if not file_path.exists() or not file_path.is_file():
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    if not stat.S_ISREG(st.st_mode):
         raise HTTPException(status_code=404, detail="Artifact not found")
     
     # Get mime type
@@ -63,14 +211,49 @@ def get_artifact(conversation_id: str, filename: str):
     if not mime_type:
         mime_type = "application/octet-stream"
     
-    return FileResponse(
+    # Let nginx stream the file (sendfile) instead of pushing bytes through Python
+    if settings.use_x_accel:
+        prefix = settings.x_accel_artifacts_prefix.rstrip("/")
+        return Response(
+            status_code=200,
+            media_type=mime_type,
+            headers={
+                "X-Accel-Redirect": f"{prefix}/{quote(conversation_id)}/{quote(filename)}",
+                "Content-Disposition": f'attachment; filename="{filename}"',
+            },
+        )
+    
+    response = ZeroCopyFileResponse(
         path=file_path,
         filename=filename,
         media_type=mime_type,
         headers={
             "Content-Disposition": f'attachment; filename="{filename}"'
-        }
+        },
+        stat_result=st,
     )
+    
+    validators = {
+        "ETag": response.headers["etag"],
+        "Last-Modified": response.headers["last-modified"],
+    }
+    if "range" not in request.headers:
+        if _is_not_modified(request.headers, st, validators["ETag"]):
+            return Response(status_code=304, headers=validators)
+        if st.st_size <= _SMALL_FILE_MAX_BYTES:
+            # Same validators as the file response, so a later Range request
+            # (served by FileResponse) lines up with this one
+            return Response(
+                content=_read_small_artifact(str(file_path), st),
+                media_type=mime_type,
+                headers={
+                    "Content-Disposition": f'attachment; filename="{filename}"',
+                    "Accept-Ranges": "bytes",
+                    **validators,
+                }
+            )
+    
+    return response
 
 
 @router.get("/{conversation_id}")
@@ -87,20 +270,23 @@ def list_artifacts(conversation_id: str):
         raise HTTPException(status_code=404, detail="Conversation not found")
     
     # Get artifacts directory
-    conv_artifacts_dir = ARTIFACTS_DIR / conversation_id
+    conv_artifacts_dir = os.path.join(ARTIFACTS_DIR, conversation_id)
     
-    if not conv_artifacts_dir.exists():
+    try:
+        entries = _scan_artifacts(conversation_id, conv_artifacts_dir)
+    except FileNotFoundError:
         return {"artifacts": [], "total": 0}
     
-    artifacts = []
-    for file_path in conv_artifacts_dir.iterdir():
-        if file_path.is_file() and file_path.suffix.lower() in ALLOWED_EXTENSIONS:
-            artifacts.append({
-                "filename": file_path.name,
-                "type": file_path.suffix[1:].lower(),
-                "url": f"/api/artifacts/{conversation_id}/{file_path.name}",
-                "size_bytes": file_path.stat().st_size
-            })
+    url_prefix = f"/api/artifacts/{conversation_id}/"
+    artifacts = [
+        {
+            "filename": filename,
+            "type": file_type,
+            "url": url_prefix + filename,
+            "size_bytes": size_bytes
+        }
+        for filename, file_type, size_bytes, _ in entries
+    ]
     
     return {"artifacts": artifacts, "total": len(artifacts)}
 
@@ -112,37 +298,19 @@ def list_all_artifacts(limit: int = 50):
     
     Returns a list of artifact metadata with conversation ID.
     """
-    if not ARTIFACTS_DIR.exists():
-        return {"artifacts": [], "total": 0}
-    
     db = get_db()
-    all_artifacts = []
     
-    # Iterate through all conversation directories
-    for conv_dir in ARTIFACTS_DIR.iterdir():
-        if not conv_dir.is_dir():
-            continue
-        
-        conversation_id = conv_dir.name
-        if not db.conversation_exists(conversation_id):
-            continue
-        
-        for file_path in conv_dir.iterdir():
-            if file_path.is_file() and file_path.suffix.lower() in ALLOWED_EXTENSIONS:
-                stat = file_path.stat()
-                all_artifacts.append({
-                    "filename": file_path.name,
-                    "type": file_path.suffix[1:].lower(),
-                    "url": f"/api/artifacts/{conversation_id}/{file_path.name}",
-                    "size_bytes": stat.st_size,
-                    "conversation_id": conversation_id,
-                    "created_at": stat.st_mtime  # Unix timestamp for sorting
-                })
-    
-    # Sort by creation time (newest first)
-    all_artifacts.sort(key=lambda x: x["created_at"], reverse=True)
-    
-    # Limit results
-    all_artifacts = all_artifacts[:limit]
+    # Metadata is indexed at generation time; no directory walk or stat needed
+    all_artifacts = [
+        {
+            "filename": record.filename,
+            "type": record.type,
+            "url": f"/api/artifacts/{record.conversation_id}/{record.filename}",
+            "size_bytes": record.size_bytes,
+            "conversation_id": record.conversation_id,
+            "created_at": record.created_at  # Unix timestamp for sorting
+        }
+        for record in db.top_artifacts(limit)
+    ]
     
     return {"artifacts": all_artifacts, "total": len(all_artifacts)}
@@ -4,19 +4,29 @@ Chat API Route.
 This endpoint exposes a single AI SDK UIMessageChunk SSE stream protocol.
 """
 
-import json
-import uuid
 import ast
+import asyncio
+import itertools
+import logging
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from contextvars import copy_context
-from pathlib import Path
-from typing import Any, Iterator, Optional
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Iterator, NamedTuple, Optional, Union
 
+import orjson
+from agno.run.agent import RunEvent
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 
-from app.agent_factory import create_agent
-from app.db.conversations import get_db
+from app.agent_factory import get_agent
+from app.db.conversations import ConversationDB, get_db
 from app.paths import ARTIFACTS_DIR
 # IMPORTANT: Import the same ContextVar instances as the harness tools.
 #
@@ -29,6 +39,8 @@ from runtime_context import current_artifact_dir, current_artifact_run_id, curre
 
 router = APIRouter(prefix="/api/chat", tags=["chat"])
 
+logger = logging.getLogger(__name__)
+
 
 class ChatRequest(BaseModel):
     """Request model for chat endpoint."""
@@ -48,51 +60,80 @@ class ChatRequest(BaseModel):
         }
 
 
+# Fallback tool call ids: unique per process without touching the OS RNG
+_TOOL_CALL_ID_PREFIX = f"call_{time.time_ns():x}_"
+_tool_call_seq = itertools.count(1)
+
+
 def _extract_tool_call_id(obj: Any) -> str:
     """Best-effort tool call id extraction across providers."""
     for attr in ("id", "tool_call_id", "toolCallId"):
-        if hasattr(obj, attr):
-            val = getattr(obj, attr)
-            if val:
-                return str(val)
+        val = getattr(obj, attr, None)
+        if val:
+            return str(val)
     if isinstance(obj, dict):
         for key in ("id", "tool_call_id", "toolCallId"):
             val = obj.get(key)
             if val:
                 return str(val)
-    return str(uuid.uuid4())[:8]
+    return f"{_TOOL_CALL_ID_PREFIX}{next(_tool_call_seq)}"
 
 
-def _format_sse_json(data: dict[str, Any]) -> str:
+def _format_sse_json(data: dict[str, Any]) -> bytes:
     """Format one UIMessageChunk as SSE."""
-    return f"data: {json.dumps(data)}\n\n"
-
-
-def _guess_media_type(filename: str) -> str:
-    suffix = Path(filename).suffix.lower()
-    if suffix == ".md":
-        return "text/markdown"
-    if suffix == ".txt":
-        return "text/plain"
-    if suffix == ".pdf":
-        return "application/pdf"
-    if suffix == ".docx":
-        return "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-    if suffix == ".xlsx":
-        return "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    if suffix == ".png":
-        return "image/png"
-    if suffix in (".jpg", ".jpeg"):
-        return "image/jpeg"
-    if suffix == ".webp":
-        return "image/webp"
-    return "application/octet-stream"
+    return b"data: " + orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS) + b"\n\n"
+
+
+class _Delta(NamedTuple):
+    """A text/reasoning delta left unencoded so the consumer can coalesce it."""
+
+    type: str
+    id: str
+    delta: str
+
+
+# Comment-only padding sent first so proxies/browsers that buffer small
+# responses start delivering the stream immediately.
+_SSE_PRELUDE = (": " + " " * 2048 + "\n\n").encode()
+
+# Comment frame sent when the agent has been silent this long (e.g. a slow tool
+# call), so proxies/CDNs don't drop the idle connection mid-run.
+_SSE_KEEPALIVE = b": ping\n\n"
+_SSE_KEEPALIVE_INTERVAL_S = 15.0
+# Frames that are already queued go out in one write, up to this many bytes
+_SSE_BATCH_MAX_BYTES = 4096
+
+# Consecutive deltas for the same part are merged into one SSE frame for up to
+# this long (or until this many characters accumulate) before being flushed.
+_COALESCE_WINDOW_S = 0.008
+_COALESCE_MAX_CHARS = 4096
+
+# Each chat holds one worker thread for its whole agent run. A dedicated pool,
+# sized like anyio's default thread limiter, keeps concurrent chats from being
+# capped by asyncio's CPU-sized default executor.
+_AGENT_RUN_MAX_WORKERS = 40
+_agent_run_executor = ThreadPoolExecutor(
+    max_workers=_AGENT_RUN_MAX_WORKERS, thread_name_prefix="agent-run"
+)
+
+
+_MEDIA_TYPES = {
+    ".md": "text/markdown",
+    ".txt": "text/plain",
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".webp": "image/webp",
+}
 
 
 def _normalize_artifact(
     artifact: Any,
     conversation_id: str,
-    conv_artifacts_dir: Path,
+    conv_artifacts_dir: str,
 ) -> Optional[dict[str, Any]]:
     if not isinstance(artifact, dict):
         return None
@@ -100,7 +141,7 @@ def _normalize_artifact(
     filename = artifact.get("filename")
     url = artifact.get("url")
     if not filename and isinstance(url, str):
-        filename = Path(url).name
+        filename = url.rstrip("/").rpartition("/")[2]
     if not filename:
         return None
 
@@ -108,13 +149,21 @@ def _normalize_artifact(
     if not url:
         url = f"/api/artifacts/{conversation_id}/{filename}"
 
-    media_type = artifact.get("mediaType") or _guess_media_type(filename)
-    artifact_type = artifact.get("type") or Path(filename).suffix.lstrip(".").lower()
+    media_type = artifact.get("mediaType")
+    artifact_type = artifact.get("type")
+    if not media_type or not artifact_type:
+        # Same result as Path(filename).suffix (dotfiles have none), without the Path
+        dot = filename.rfind(".")
+        suffix = filename[dot:].lower() if dot > 0 else ""
+        media_type = media_type or _MEDIA_TYPES.get(suffix, "application/octet-stream")
+        artifact_type = artifact_type or suffix[1:]
     size_bytes = artifact.get("size_bytes")
     if size_bytes is None:
-        file_path = conv_artifacts_dir / filename
-        if file_path.exists():
-            size_bytes = file_path.stat().st_size
+        # One stat instead of exists() + stat(); a missing file just has no size.
+        try:
+            size_bytes = os.stat(os.path.join(conv_artifacts_dir, filename)).st_size
+        except OSError:
+            pass
 
     return {
         "filename": filename,
@@ -126,11 +175,11 @@ def _normalize_artifact(
 
 
 def _extract_artifacts_from_tool_result(
-    tool_result: Any,
+    parsed: Any,
     conversation_id: str,
-    conv_artifacts_dir: Path,
+    conv_artifacts_dir: str,
 ) -> list[dict[str, Any]]:
-    parsed = _coerce_tool_result(tool_result)
+    """Collect artifacts from an already-coerced tool result (see _coerce_tool_result)."""
     if isinstance(parsed, str):
         return []
 
@@ -156,56 +205,231 @@ def _coerce_tool_result(tool_result: Any) -> Any:
     if not isinstance(tool_result, str):
         return tool_result
 
+    # Only objects/arrays are worth decoding; plain text passes through untouched.
+    head = tool_result[:64].lstrip()
+    if not head or head[0] not in "{[":
+        return tool_result
+
     try:
-        return json.loads(tool_result)
-    except json.JSONDecodeError:
+        return orjson.loads(tool_result)
+    except orjson.JSONDecodeError:
         pass
 
     # Some providers/framework layers stringify Python dicts with single quotes.
+    # literal_eval runs the full Python parser, so only try it when that's likely.
+    if "'" not in head:
+        return tool_result
     try:
         return ast.literal_eval(tool_result)
     except (SyntaxError, ValueError):
         return tool_result
 
 
-def stream_agent_response(
+_TEXT_PART_ID = "text-1"
+_REASONING_PART_ID = "reasoning-1"
+
+# Frames that never vary, encoded once at import.
+_FRAME_START_STEP = _format_sse_json({"type": "start-step"})
+_FRAME_FINISH_STEP = _format_sse_json({"type": "finish-step"})
+_FRAME_TEXT_START = _format_sse_json({"type": "text-start", "id": _TEXT_PART_ID})
+_FRAME_TEXT_END = _format_sse_json({"type": "text-end", "id": _TEXT_PART_ID})
+_FRAME_REASONING_START = _format_sse_json({"type": "reasoning-start", "id": _REASONING_PART_ID})
+_FRAME_REASONING_END = _format_sse_json({"type": "reasoning-end", "id": _REASONING_PART_ID})
+_FRAME_FINISH_STOP = _format_sse_json({"type": "finish", "finishReason": "stop"})
+_FRAME_FINISH_ERROR = _format_sse_json({"type": "finish", "finishReason": "error"})
+
+
+@dataclass
+class _RunState:
+    """Mutable per-response state shared by the agent event handlers."""
+
+    conversation_id: str
+    conv_artifacts_dir: str
+    db: ConversationDB
+    text_started: bool = False
+    reasoning_started: bool = False
+    run_failed: bool = False
+    done: bool = False
+    full_content: str = ""
+    artifacts: list[dict[str, Any]] = field(default_factory=list)
+    emitted_artifact_urls: set[str] = field(default_factory=set)
+
+
+def _on_tool_call_started(ev: Any, state: _RunState) -> Iterator[Union[bytes, _Delta]]:
+    tool = getattr(ev, "tool", None)
+    if not tool:
+        return
+    tool_call_id = tool.tool_call_id or _extract_tool_call_id(tool)
+    tool_name = tool.tool_name or "tool"
+    tool_args = tool.tool_args or {}
+
+    yield _format_sse_json(
+        {
+            "type": "tool-input-start",
+            "toolCallId": tool_call_id,
+            "toolName": tool_name,
+        }
+    )
+    yield _format_sse_json(
+        {
+            "type": "tool-input-available",
+            "toolCallId": tool_call_id,
+            "toolName": tool_name,
+            "input": tool_args,
+        }
+    )
+
+
+def _on_tool_call_completed(ev: Any, state: _RunState) -> Iterator[Union[bytes, _Delta]]:
+    tool = getattr(ev, "tool", None)
+    if not tool:
+        return
+    tool_call_id = tool.tool_call_id or _extract_tool_call_id(tool)
+    tool_result = _coerce_tool_result(tool.result)
+
+    yield _format_sse_json(
+        {
+            "type": "tool-output-available",
+            "toolCallId": tool_call_id,
+            "output": tool_result,
+        }
+    )
+
+    new_artifacts = []
+    for artifact in _extract_artifacts_from_tool_result(
+        tool_result,
+        state.conversation_id,
+        state.conv_artifacts_dir,
+    ):
+        url = artifact["url"]
+        if url in state.emitted_artifact_urls:
+            continue
+        state.emitted_artifact_urls.add(url)
+        new_artifacts.append(artifact)
+
+    # Index this tool call's artifacts in one commit before announcing them
+    if new_artifacts:
+        with state.db.batch():
+            for artifact in new_artifacts:
+                state.db.add_artifact(
+                    state.conversation_id,
+                    artifact["filename"],
+                    artifact["type"],
+                    artifact["size_bytes"],
+                )
+
+    for artifact in new_artifacts:
+        state.artifacts.append(
+            {
+                "filename": artifact["filename"],
+                "type": artifact["type"],
+                "url": artifact["url"],
+                "size_bytes": artifact["size_bytes"],
+            }
+        )
+        yield _format_sse_json(
+            {
+                "type": "file",
+                "url": artifact["url"],
+                "mediaType": artifact["mediaType"],
+            }
+        )
+
+
+def _on_tool_call_error(ev: Any, state: _RunState) -> Iterator[Union[bytes, _Delta]]:
+    tool = getattr(ev, "tool", None)
+    if not tool:
+        return
+    tool_call_id = tool.tool_call_id or _extract_tool_call_id(tool)
+    error_text = getattr(ev, "error", None) or "Tool failed"
+    yield _format_sse_json(
+        {
+            "type": "tool-output-error",
+            "toolCallId": tool_call_id,
+            "errorText": str(error_text),
+        }
+    )
+
+
+def _on_reasoning_delta(ev: Any, state: _RunState) -> Iterator[Union[bytes, _Delta]]:
+    delta = getattr(ev, "reasoning_content", "") or ""
+    if delta:
+        if not state.reasoning_started:
+            state.reasoning_started = True
+            yield _FRAME_REASONING_START
+        yield _Delta("reasoning-delta", _REASONING_PART_ID, delta)
+
+
+def _on_run_content(ev: Any, state: _RunState) -> Iterator[Union[bytes, _Delta]]:
+    delta = getattr(ev, "content", None)
+    if isinstance(delta, str) and delta:
+        if not state.text_started:
+            state.text_started = True
+            yield _FRAME_TEXT_START
+        state.full_content += delta
+        yield _Delta("text-delta", _TEXT_PART_ID, delta)
+
+
+def _on_run_error(ev: Any, state: _RunState) -> Iterator[Union[bytes, _Delta]]:
+    error_text = getattr(ev, "content", None) or "Run error"
+    state.run_failed = True
+    state.done = True
+    yield _format_sse_json({"type": "error", "errorText": str(error_text)})
+
+
+def _on_run_completed(ev: Any, state: _RunState) -> Iterator[Union[bytes, _Delta]]:
+    state.done = True
+    final_content = getattr(ev, "content", None)
+    if not state.text_started and isinstance(final_content, str) and final_content:
+        state.text_started = True
+        yield _FRAME_TEXT_START
+        state.full_content = final_content
+        yield _Delta("text-delta", _TEXT_PART_ID, final_content)
+
+
+# Agent event value -> handler; events without an entry are ignored.
+_EVENT_HANDLERS: dict[str, Callable[[Any, _RunState], Iterator[Union[bytes, _Delta]]]] = {
+    RunEvent.tool_call_started.value: _on_tool_call_started,
+    RunEvent.tool_call_completed.value: _on_tool_call_completed,
+    RunEvent.tool_call_error.value: _on_tool_call_error,
+    RunEvent.reasoning_content_delta.value: _on_reasoning_delta,
+    RunEvent.run_content.value: _on_run_content,
+    RunEvent.run_error.value: _on_run_error,
+    RunEvent.run_completed.value: _on_run_completed,
+}
+
+
+def _iter_agent_response(
     message: str,
     conversation_id: str,
-) -> Iterator[str]:
-    """Stream as AI SDK UIMessageChunk SSE."""
+    conversation_history: Optional[list[dict]] = None,
+) -> Iterator[Union[bytes, _Delta]]:
+    """
+    Blocking half of the stream: DB writes, artifact file I/O and the agent run.
+
+    Sets the run ContextVars the harness tools read, so it must be driven from
+    inside a dedicated context (stream_agent_response runs it under copy_context()).
+    """
     db = get_db()
-    conversation_history = db.get_conversation_history(conversation_id)
-
-    db.add_message(
-        conversation_id=conversation_id,
-        role="user",
-        content=message,
-        update_conversation_updated_at=False,
-    )
+    if conversation_history is None:
+        conversation_history = db.get_conversation_history(conversation_id)
+    # The user message is written together with the reply once the run ends
+    # (see db.add_turn), but keeps the time it was received.
+    user_timestamp = datetime.utcnow().isoformat()
 
     conv_artifacts_dir = ARTIFACTS_DIR / conversation_id
     conv_artifacts_dir.mkdir(parents=True, exist_ok=True)
 
-    run_context = copy_context()
-    run_context.run(current_conversation_id.set, conversation_id)
-    run_context.run(current_artifact_dir.set, conv_artifacts_dir)
-    run_context.run(current_artifact_run_id.set, uuid.uuid4().hex[:10])
-
-    def _stream() -> Iterator[str]:
-        from agno.run.agent import RunEvent
+    current_conversation_id.set(conversation_id)
+    current_artifact_dir.set(conv_artifacts_dir)
+    current_artifact_run_id.set(secrets.token_hex(5))
 
-        text_part_id = "text-1"
-        reasoning_part_id = "reasoning-1"
-        text_started = False
-        reasoning_started = False
-        run_failed = False
-        full_content = ""
-        artifacts: list[dict[str, Any]] = []
-        emitted_artifact_urls: set[str] = set()
-
-        yield f": {' ' * 2048}\n\n"
+    state = _RunState(conversation_id=conversation_id, conv_artifacts_dir=str(conv_artifacts_dir), db=db)
+    turn_saved = False
+    try:
+        yield _SSE_PRELUDE
 
-        message_id = str(uuid.uuid4())
+        message_id = secrets.token_hex(16)
         yield _format_sse_json(
             {
                 "type": "start",
@@ -213,178 +437,219 @@ def stream_agent_response(
                 "messageMetadata": {"conversationId": conversation_id},
             }
         )
-        yield _format_sse_json({"type": "start-step"})
+        yield _FRAME_START_STEP
 
         try:
-            agent = create_agent()
+            agent = get_agent()
             messages = conversation_history + [{"role": "user", "content": message}]
             run_stream = agent.run(messages, stream=True, stream_events=True)
+            # Checked once per stream so per-event logging costs nothing when disabled.
+            debug_events = logger.isEnabledFor(logging.DEBUG)
 
             for ev in run_stream:
                 event = getattr(ev, "event", None)
+                if debug_events:
+                    logger.debug("chat %s: agent event %s", conversation_id, event)
 
-                if event == RunEvent.tool_call_started.value and getattr(ev, "tool", None):
-                    tool = ev.tool
-                    tool_call_id = tool.tool_call_id or _extract_tool_call_id(tool)
-                    tool_name = tool.tool_name or "tool"
-                    tool_args = tool.tool_args or {}
-
-                    yield _format_sse_json(
-                        {
-                            "type": "tool-input-start",
-                            "toolCallId": tool_call_id,
-                            "toolName": tool_name,
-                        }
-                    )
-                    yield _format_sse_json(
-                        {
-                            "type": "tool-input-available",
-                            "toolCallId": tool_call_id,
-                            "toolName": tool_name,
-                            "input": tool_args,
-                        }
-                    )
-                    continue
+                handler = _EVENT_HANDLERS.get(event)
+                if handler is not None:
+                    yield from handler(ev, state)
+                    if state.done:
+                        break
 
-                if event == RunEvent.tool_call_completed.value and getattr(ev, "tool", None):
-                    tool = ev.tool
-                    tool_call_id = tool.tool_call_id or _extract_tool_call_id(tool)
-                    tool_result = _coerce_tool_result(tool.result)
-
-                    yield _format_sse_json(
-                        {
-                            "type": "tool-output-available",
-                            "toolCallId": tool_call_id,
-                            "output": tool_result,
-                        }
-                    )
-
-                    for artifact in _extract_artifacts_from_tool_result(
-                        tool_result,
-                        conversation_id,
-                        conv_artifacts_dir,
-                    ):
-                        url = artifact["url"]
-                        if url in emitted_artifact_urls:
-                            continue
-                        emitted_artifact_urls.add(url)
-                        artifacts.append(
-                            {
-                                "filename": artifact["filename"],
-                                "type": artifact["type"],
-                                "url": artifact["url"],
-                                "size_bytes": artifact["size_bytes"],
-                            }
-                        )
-                        yield _format_sse_json(
-                            {
-                                "type": "file",
-                                "url": artifact["url"],
-                                "mediaType": artifact["mediaType"],
-                            }
-                        )
-                    continue
+            if state.reasoning_started:
+                yield _FRAME_REASONING_END
+            if state.text_started:
+                yield _FRAME_TEXT_END
 
-                if event == RunEvent.tool_call_error.value and getattr(ev, "tool", None):
-                    tool = ev.tool
-                    tool_call_id = tool.tool_call_id or _extract_tool_call_id(tool)
-                    error_text = getattr(ev, "error", None) or "Tool failed"
-                    yield _format_sse_json(
-                        {
-                            "type": "tool-output-error",
-                            "toolCallId": tool_call_id,
-                            "errorText": str(error_text),
-                        }
-                    )
-                    continue
+            yield _FRAME_FINISH_STEP
+            yield _FRAME_FINISH_ERROR if state.run_failed else _FRAME_FINISH_STOP
 
-                if event == RunEvent.reasoning_content_delta.value:
-                    delta = getattr(ev, "reasoning_content", "") or ""
-                    if delta:
-                        if not reasoning_started:
-                            reasoning_started = True
-                            yield _format_sse_json({"type": "reasoning-start", "id": reasoning_part_id})
-                        yield _format_sse_json(
-                            {"type": "reasoning-delta", "id": reasoning_part_id, "delta": delta}
-                        )
-                    continue
+            if not state.run_failed:
+                db.add_turn(
+                    conversation_id=conversation_id,
+                    user_content=message,
+                    user_timestamp=user_timestamp,
+                    assistant_content=state.full_content,
+                    artifacts=state.artifacts if state.artifacts else None,
+                )
+                turn_saved = True
+        except Exception as exc:
+            logger.exception("chat %s: agent run failed", conversation_id)
+            yield _format_sse_json({"type": "error", "errorText": f"Error: {str(exc)}"})
+            yield _FRAME_FINISH_ERROR
+    finally:
+        # Failed, errored or abandoned runs still record what the user sent.
+        if not turn_saved:
+            db.add_turn(
+                conversation_id=conversation_id,
+                user_content=message,
+                user_timestamp=user_timestamp,
+            )
+        current_artifact_run_id.set(None)
+        current_artifact_dir.set(None)
+        current_conversation_id.set(None)
 
-                if event == RunEvent.run_content.value:
-                    delta = getattr(ev, "content", None)
-                    if isinstance(delta, str) and delta:
-                        if not text_started:
-                            text_started = True
-                            yield _format_sse_json({"type": "text-start", "id": text_part_id})
-                        full_content += delta
-                        yield _format_sse_json({"type": "text-delta", "id": text_part_id, "delta": delta})
-                    continue
 
-                if event == RunEvent.run_error.value:
-                    error_text = getattr(ev, "content", None) or "Run error"
-                    run_failed = True
-                    yield _format_sse_json({"type": "error", "errorText": str(error_text)})
-                    break
+_STREAM_DONE = object()
 
-                if event == RunEvent.run_completed.value:
-                    final_content = getattr(ev, "content", None)
-                    if not text_started and isinstance(final_content, str) and final_content:
-                        text_started = True
-                        yield _format_sse_json({"type": "text-start", "id": text_part_id})
-                        full_content = final_content
-                        yield _format_sse_json({"type": "text-delta", "id": text_part_id, "delta": final_content})
-                    break
 
-            if reasoning_started:
-                yield _format_sse_json({"type": "reasoning-end", "id": reasoning_part_id})
-            if text_started:
-                yield _format_sse_json({"type": "text-end", "id": text_part_id})
+def _log_producer_failure(future: "asyncio.Future[None]") -> None:
+    """Log a producer error nobody awaited (the client left or the stream failed)."""
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("chat stream producer failed", exc_info=future.exception())
 
-            yield _format_sse_json({"type": "finish-step"})
-            yield _format_sse_json(
-                {"type": "finish", "finishReason": "error" if run_failed else "stop"}
-            )
 
-            if not run_failed:
-                db.add_message(
-                    conversation_id=conversation_id,
-                    role="assistant",
-                    content=full_content,
-                    artifacts=artifacts if artifacts else None,
-                )
-        except Exception as exc:
-            yield _format_sse_json({"type": "error", "errorText": f"Error: {str(exc)}"})
-            yield _format_sse_json({"type": "finish", "finishReason": "error"})
+async def stream_agent_response(
+    message: str,
+    conversation_id: str,
+    conversation_history: Optional[list[dict]] = None,
+) -> AsyncIterator[bytes]:
+    """Stream as AI SDK UIMessageChunk SSE.
+
+    The blocking work runs on one worker thread for the whole response and
+    hands frames to the event loop through a queue, so tool-completion
+    stat() calls and DB writes never stall delivery of already-produced
+    frames, and no threadpool hop is paid per chunk. Token deltas are
+    coalesced here so a burst of tiny deltas goes out as one frame, and frames
+    already waiting in the queue are written together (up to _SSE_BATCH_MAX_BYTES).
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue[Any] = asyncio.Queue()
+    cancelled = threading.Event()
+
+    def _produce() -> None:
+        frames = _iter_agent_response(message, conversation_id, conversation_history)
+        try:
+            for frame in frames:
+                if cancelled.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, frame)
+        except BaseException as exc:
+            loop.call_soon_threadsafe(queue.put_nowait, exc)
+        finally:
+            frames.close()
+            loop.call_soon_threadsafe(queue.put_nowait, _STREAM_DONE)
+
+    # The whole producer runs inside one copied context, so the ContextVars set by
+    # _iter_agent_response reach the tools without a per-frame context switch.
+    producer = loop.run_in_executor(_agent_run_executor, copy_context().run, _produce)
+    producer_awaited = False
+    pending: Optional[_Delta] = None
+    pending_parts: list[str] = []
+    pending_chars = 0
+    deadline = 0.0
+    out: list[bytes] = []
+    out_bytes = 0
+
+    def _push(frame: bytes) -> None:
+        nonlocal out_bytes
+        out.append(frame)
+        out_bytes += len(frame)
+
+    def _drain() -> bytes:
+        nonlocal out_bytes
+        chunk = out[0] if len(out) == 1 else b"".join(out)
+        out.clear()
+        out_bytes = 0
+        return chunk
+
+    def _flush() -> bytes:
+        nonlocal pending, pending_chars
+        frame = _format_sse_json(
+            {"type": pending.type, "id": pending.id, "delta": "".join(pending_parts)}
+        )
+        pending = None
+        pending_parts.clear()
+        pending_chars = 0
+        return frame
 
-    inner = _stream()
     try:
         while True:
-            yield run_context.run(next, inner)
-    except StopIteration:
-        return
+            if out_bytes >= _SSE_BATCH_MAX_BYTES:
+                yield _drain()
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                if out:
+                    # Nothing else is ready: write the batch before waiting
+                    yield _drain()
+                    continue
+                if pending is None:
+                    try:
+                        item = await asyncio.wait_for(queue.get(), _SSE_KEEPALIVE_INTERVAL_S)
+                    except asyncio.TimeoutError:
+                        _push(_SSE_KEEPALIVE)
+                        continue
+                else:
+                    timeout = deadline - loop.time()
+                    try:
+                        if timeout <= 0:
+                            raise asyncio.TimeoutError
+                        item = await asyncio.wait_for(queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        _push(_flush())
+                        continue
+
+            if isinstance(item, _Delta):
+                if pending is not None and (pending.type, pending.id) != (item.type, item.id):
+                    _push(_flush())
+                if pending is None:
+                    pending = item
+                    deadline = loop.time() + _COALESCE_WINDOW_S
+                pending_parts.append(item.delta)
+                pending_chars += len(item.delta)
+                if pending_chars >= _COALESCE_MAX_CHARS:
+                    _push(_flush())
+                continue
+
+            if pending is not None:
+                _push(_flush())
+            if item is _STREAM_DONE or isinstance(item, BaseException):
+                if out:
+                    yield _drain()
+                if item is _STREAM_DONE:
+                    # Surfaces anything the producer raised after its last frame
+                    producer_awaited = True
+                    await producer
+                    return
+                raise item
+            _push(item)
     finally:
-        run_context.run(current_artifact_run_id.set, None)
-        run_context.run(current_artifact_dir.set, None)
-        run_context.run(current_conversation_id.set, None)
+        # Client went away (or we finished): let the producer stop at the next frame.
+        cancelled.set()
+        if not producer_awaited:
+            producer.add_done_callback(_log_producer_failure)
 
 
-@router.post("")
-def chat(request: ChatRequest):
-    """Send a message and receive an AI SDK UIMessageChunk SSE stream."""
+def _resolve_conversation(request: ChatRequest) -> tuple[str, list[dict]]:
+    """Return (conversation_id, history), creating the conversation if none was given."""
     db = get_db()
 
     if request.conversation_id:
-        if not db.conversation_exists(request.conversation_id):
+        # Existence check and history fetch share one query
+        history = db.begin_turn(request.conversation_id)
+        if history is None:
             raise HTTPException(status_code=404, detail="Conversation not found")
-        conversation_id = request.conversation_id
-    else:
-        conversation_id = db.create_conversation(first_message=request.message)
+        return request.conversation_id, history
+    return db.create_conversation(first_message=request.message), []
+
+
+@router.post("")
+async def chat(request: ChatRequest):
+    """Send a message and receive an AI SDK UIMessageChunk SSE stream."""
+    # The endpoint itself runs on the event loop so the async stream is
+    # consumed without a threadpool hop per chunk; only the DB lookup is offloaded.
+    conversation_id, history = await run_in_threadpool(_resolve_conversation, request)
 
     return StreamingResponse(
-        stream_agent_response(request.message, conversation_id),
+        stream_agent_response(request.message, conversation_id, history),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache, no-transform",
             "Connection": "keep-alive",
+            # Frames are already bytes; make sure no intermediary compresses (and buffers) them.
+            "Content-Encoding": "identity",
             "X-Accel-Buffering": "no",
         },
     )
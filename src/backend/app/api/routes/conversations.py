@@ -4,17 +4,41 @@ Conversations API Route
 Endpoints for listing, retrieving, and deleting conversations.
 """
 
-import shutil
-from typing import List, Optional
+import hashlib
+import os
+import threading
+import time
+from typing import Iterator, List, Optional
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+import orjson
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, TypeAdapter
 
 from app.config import settings
 from app.db.conversations import get_db, ConversationSummary, Conversation, Message
 from app.paths import ARTIFACTS_DIR
 
-router = APIRouter(prefix="/api/conversations", tags=["conversations"])
+router = APIRouter(
+    prefix="/api/conversations",
+    tags=["conversations"],
+    default_response_class=ORJSONResponse,
+)
+
+# Messages serialized per write when streaming a conversation body
+_MESSAGES_PER_CHUNK = 64
+
+# Rendered listing pages keyed on (limit, offset). An entry is reused only while
+# no write has been committed since it was built; the TTL bounds staleness from
+# writes made outside this process (e.g. the migration script).
+_LISTING_CACHE_TTL_S = 3.0
+_LISTING_CACHE_MAX_ENTRIES = 512
+_listing_cache: dict[tuple[int, int], tuple[int, float, bytes]] = {}
+_listing_cache_lock = threading.Lock()
+
+# ConversationSummary already has the ConversationSummaryResponse fields, so the
+# dataclasses are serialized as-is in pydantic-core, with no per-row model build.
+_summaries_adapter = TypeAdapter(List[ConversationSummary])
 
 
 # Pydantic models for API responses
@@ -50,7 +74,7 @@ class ConversationListResponse(BaseModel):
     total: int
 
 
-@router.get("", response_model=ConversationListResponse)
+@router.get("", responses={200: {"model": ConversationListResponse}})
 def list_conversations(limit: int = 50, offset: int = 0):
     """
     List all conversations, most recent first.
@@ -59,59 +83,146 @@ def list_conversations(limit: int = 50, offset: int = 0):
     Supports pagination via limit and offset parameters.
     """
     db = get_db()
+    key = (limit, offset)
+    # Read the generation before querying: a write landing mid-query bumps it
+    # and the entry stored below is never served.
+    generation = db.write_generation
+    now = time.monotonic()
+    cached = _listing_cache.get(key)
+    if cached and cached[0] == generation and now - cached[1] < _LISTING_CACHE_TTL_S:
+        return Response(content=cached[2], media_type="application/json")
+    
     conversations, total = db.list_conversations(limit=limit, offset=offset)
     
-    return ConversationListResponse(
-        conversations=[
-            ConversationSummaryResponse(
-                id=c.id,
-                title=c.title,
-                preview=c.preview,
-                message_count=c.message_count,
-                created_at=c.created_at,
-                updated_at=c.updated_at
-            )
-            for c in conversations
-        ],
-        total=total
-    )
-
-
-@router.get("/{conversation_id}", response_model=ConversationResponse)
-def get_conversation(conversation_id: str):
+    # ConversationListResponse-shaped body, spliced around the Rust-side list dump;
+    # skips FastAPI's re-validation and jsonable_encoder
+    content = b"".join((
+        b'{"conversations":',
+        _summaries_adapter.dump_json(conversations),
+        b',"total":',
+        str(total).encode(),
+        b"}",
+    ))
+    with _listing_cache_lock:
+        if len(_listing_cache) >= _LISTING_CACHE_MAX_ENTRIES:
+            _listing_cache.clear()
+        _listing_cache[key] = (generation, now, content)
+    return Response(content=content, media_type="application/json")
+
+
+def _conversation_etag(version: str) -> str:
+    return f'W/"{hashlib.blake2b(version.encode(), digest_size=12).hexdigest()}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison: W/"x" and "x" name the same representation
+    return "*" in candidates or etag in candidates or etag[2:] in candidates
+
+
+@router.get("/{conversation_id}", responses={200: {"model": ConversationResponse}})
+def get_conversation(conversation_id: str, request: Request):
     """
     Get a conversation with all its messages.
     
     Returns the full conversation including all messages, thinking steps, and artifacts.
+    Supports If-None-Match: unchanged conversations get a bodyless 304.
     """
     db = get_db()
+    
+    # One indexed single-row read decides whether anything needs serializing
+    version = db.get_conversation_version(conversation_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    
+    etag = _conversation_etag(version)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
     conversation = db.get_conversation(conversation_id)
     
     if not conversation:
         raise HTTPException(status_code=404, detail="Conversation not found")
     
-    return ConversationResponse(
-        id=conversation.id,
-        title=conversation.title,
-        messages=[
-            MessageResponse(
-                id=m.id,
-                conversation_id=m.conversation_id,
-                role=m.role,
-                content=m.content,
-                artifacts=m.artifacts,
-                timestamp=m.timestamp
-            )
-            for m in conversation.messages
-        ],
-        created_at=conversation.created_at,
-        updated_at=conversation.updated_at,
-        is_shared=conversation.is_shared
+    # Histories can be large: stream the JSON body in message batches instead of
+    # building it (and a second, serialized copy) in memory. The DB rows already
+    # have the response shape, so Pydantic validation is skipped;
+    # ConversationResponse stays the documented schema.
+    return StreamingResponse(
+        _iter_conversation_json(conversation),
+        media_type="application/json",
+        headers=headers,
     )
 
 
+def _message_payload(m: Message) -> dict:
+    return {
+        "id": m.id,
+        "conversation_id": m.conversation_id,
+        "role": m.role,
+        "content": m.content,
+        "artifacts": m.artifacts,
+        "timestamp": m.timestamp,
+    }
+
+
+def _iter_conversation_json(conversation: Conversation) -> Iterator[bytes]:
+    """Yield a ConversationResponse-shaped JSON document in chunks."""
+    head = orjson.dumps({"id": conversation.id, "title": conversation.title})
+    yield head[:-1] + b',"messages":['
+
+    messages = conversation.messages
+    for start in range(0, len(messages), _MESSAGES_PER_CHUNK):
+        batch = b",".join(
+            orjson.dumps(_message_payload(m), option=orjson.OPT_NON_STR_KEYS)
+            for m in messages[start:start + _MESSAGES_PER_CHUNK]
+        )
+        yield batch if start == 0 else b"," + batch
+
+    tail = orjson.dumps({
+        "created_at": conversation.created_at,
+        "updated_at": conversation.updated_at,
+        "is_shared": conversation.is_shared,
+    })
+    yield b"]," + tail[1:]
+
+
+def _purge_dir(path: str) -> None:
+    """
+    Remove a directory tree using scandir's cached entry types.
+    
+    Cheaper than shutil.rmtree's per-entry stat; missing paths are ignored.
+    """
+    dirs = []
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        dirs.append(current)
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        try:
+                            os.unlink(entry.path)
+                        except FileNotFoundError:
+                            pass
+        except FileNotFoundError:
+            continue
+    # Children were appended after their parents
+    for directory in reversed(dirs):
+        try:
+            os.rmdir(directory)
+        except FileNotFoundError:
+            pass
+
+
 @router.delete("/{conversation_id}")
-def delete_conversation(conversation_id: str):
+def delete_conversation(conversation_id: str, background_tasks: BackgroundTasks):
     """
     Delete a conversation and all its messages and artifacts.
     
@@ -128,19 +239,11 @@ def delete_conversation(conversation_id: str):
 
     db = get_db()
     
-    # Check if exists
-    if not db.conversation_exists(conversation_id):
+    # Delete from database; nothing deleted means it didn't exist
+    if not db.delete_conversation(conversation_id):
         raise HTTPException(status_code=404, detail="Conversation not found")
     
-    # Delete artifacts directory for this conversation
-    conv_artifacts_dir = ARTIFACTS_DIR / conversation_id
-    if conv_artifacts_dir.exists():
-        shutil.rmtree(conv_artifacts_dir)
-    
-    # Delete from database
-    deleted = db.delete_conversation(conversation_id)
-    
-    if not deleted:
-        raise HTTPException(status_code=500, detail="Failed to delete conversation")
+    # Delete artifacts directory for this conversation after the response is sent
+    background_tasks.add_task(_purge_dir, os.path.join(ARTIFACTS_DIR, conversation_id))
     
     return {"status": "deleted", "conversation_id": conversation_id}
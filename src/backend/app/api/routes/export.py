@@ -5,10 +5,16 @@ Convert markdown content to various formats (DOCX, PDF, XLSX).
 Returns downloadable files.
 """
 
+import functools
+import hashlib
 import io
 import re
+import tempfile
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Literal
+from typing import IO, Callable, Iterator, Literal, Optional
+from xml.sax.saxutils import escape
 
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
@@ -16,6 +22,46 @@ from pydantic import BaseModel, Field
 
 router = APIRouter(prefix="/api/export", tags=["export"])
 
+# Exports up to this size stay in memory; larger ones spill to a temp file
+_SPOOL_MAX_BYTES = 1_000_000
+_STREAM_CHUNK_BYTES = 64 * 1024
+
+# Rendered exports keyed by (content digest, format): re-exports and retried
+# downloads of the same response skip parsing and rendering. Only exports
+# that fit in the in-memory spool are kept.
+_EXPORT_CACHE_MAX_ENTRIES = 64
+_export_cache: OrderedDict[tuple[bytes, str], bytes] = OrderedDict()
+_export_cache_lock = threading.Lock()
+
+# Patterns used on every line of every export, compiled once
+_RE_BAD_CHARS = re.compile(r'[<>:"/\\|?*]')
+# One match classifies a line; lastgroup names the kind. Bullets and
+# numbered items need non-blank text after the marker, as strip() would.
+_RE_LINE_KIND = re.compile(
+    r'(?P<h3>### )|(?P<h2>## )|(?P<h1># )'
+    r'|\s*(?:(?P<bullet>[-*] )(?=.*\S)|(?P<numbered>\d+\.\s)(?=.*\S)'
+    r'|(?P<code>```)|(?P<blank>$))'
+)
+# A code fence line (what _RE_LINE_KIND calls "code"), found anywhere in the text
+_RE_FENCE_LINE = re.compile(r'^[^\S\n]*```', re.MULTILINE)
+_RE_BOLD_ITALIC = re.compile(r'(\*\*.*?\*\*|\*.*?\*)')
+_RE_TABLE_SEP = re.compile(r'^[\|\-\s:]+$')
+# Heading kinds from _classify_line -> DOCX level / PDF (font size, line height)
+_HEADING_LEVELS = {'h1': 1, 'h2': 2, 'h3': 3}
+_PDF_HEADING_STYLES = {'h1': (16, 10), 'h2': (14, 8), 'h3': (12, 7)}
+# Unicode punctuation the built-in PDF fonts lack, mapped to ASCII; built once
+_PDF_ASCII_TABLE = str.maketrans({
+    '\u201c': '"', '\u201d': '"', '\u2018': "'", '\u2019': "'",
+    '\u2013': '-', '\u2014': '-', '\u2026': '...', '\u2022': '*',
+    '\u2192': '->', '\u2190': '<-', '\u2194': '<->',
+    '\u2713': '[x]', '\u2717': '[ ]', '\u2714': '[x]',
+})
+# Inline markers stripped for PDF, applied in this order (bold before italic,
+# so the italic pass sees what the bold pass left behind)
+_RE_BOLD = re.compile(r'\*\*(.*?)\*\*')
+_RE_ITALIC = re.compile(r'\*(.*?)\*')
+_RE_CODE = re.compile(r'`(.*?)`')
+
 
 class ExportRequest(BaseModel):
     """Request model for export endpoint"""
@@ -33,117 +79,259 @@ class ExportRequest(BaseModel):
         }
 
 
+@functools.lru_cache(maxsize=512)
 def sanitize_filename(filename: str) -> str:
     """Sanitize filename to prevent path traversal and invalid chars"""
     # Remove path separators and other dangerous chars
-    filename = re.sub(r'[<>:"/\\|?*]', '', filename)
+    filename = _RE_BAD_CHARS.sub('', filename)
     # Limit length
     return filename[:100] if filename else "export"
 
 
-def markdown_to_docx(content: str) -> io.BytesIO:
-    """Convert markdown to DOCX format"""
+def _classify_line(line: str) -> tuple[str, str]:
+    """Classify a markdown line, returning (kind, text after the marker)"""
+    match = _RE_LINE_KIND.match(line)
+    if match is None:
+        return "text", line
+    kind = match.lastgroup
+    text = line[match.end():]
+    if kind in ("bullet", "numbered"):
+        text = text.rstrip()
+    return kind, text
+
+
+def _tokenize(content: str) -> list[tuple[str, str, str]]:
+    """Split and classify content once: (raw line, kind, text after the marker)"""
+    return [(line, *_classify_line(line)) for line in content.split('\n')]
+
+
+def _iter_blocks(content: str) -> Iterator[tuple[str, Optional[str]]]:
+    """
+    Yield (kind, text) per line, collapsing each fenced code block into one
+    ('code', body) item. The closing fence is located with a single regex
+    search over the content rather than by classifying every line inside the
+    block. body is None for a block with no lines.
+    """
+    pos = 0
+    size = len(content)
+    while pos <= size:
+        end = content.find('\n', pos)
+        if end == -1:
+            end = size
+        kind, text = _classify_line(content[pos:end])
+        if kind != 'code':
+            yield kind, text
+            pos = end + 1
+            continue
+        
+        body_start = end + 1
+        fence = _RE_FENCE_LINE.search(content, body_start) if body_start <= size else None
+        if fence is None:
+            # Unclosed block runs to the end of the content
+            yield 'code', content[body_start:] if body_start <= size else None
+            return
+        fence_start = fence.start()
+        yield 'code', content[body_start:fence_start - 1] if fence_start > body_start else None
+        # Resume after the closing fence line
+        next_newline = content.find('\n', fence.end())
+        pos = size + 1 if next_newline == -1 else next_newline + 1
+
+
+def _pdf_safe_text(text: str) -> str:
+    """Encode text safely for PDF, replacing unsupported characters."""
+    # Replace common unicode characters with ASCII equivalents, then encode to
+    # latin-1 (the built-in fonts' charset), replacing unknown chars
+    text = text.translate(_PDF_ASCII_TABLE)
+    return text.encode('latin-1', errors='replace').decode('latin-1')
+
+
+def _spooled_buffer() -> IO[bytes]:
+    """Scratch file for a rendered export that spills to disk when large"""
+    return tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_BYTES)
+
+
+def _iter_chunks(buffer: IO[bytes]) -> Iterator[bytes]:
+    """Stream a rendered export in fixed-size chunks, then close it"""
+    try:
+        yield from iter(lambda: buffer.read(_STREAM_CHUNK_BYTES), b"")
+    finally:
+        buffer.close()
+
+
+def _render_cached(content: str, fmt: str, convert: Callable[[str], IO[bytes]]) -> IO[bytes]:
+    """Render an export, reusing the bytes from an earlier identical request."""
+    key = (hashlib.blake2b(content.encode(), digest_size=16).digest(), fmt)
+    with _export_cache_lock:
+        cached = _export_cache.get(key)
+        if cached is not None:
+            _export_cache.move_to_end(key)
+            return io.BytesIO(cached)
+
+    buffer = convert(content)
+    if buffer.seek(0, io.SEEK_END) <= _SPOOL_MAX_BYTES:
+        buffer.seek(0)
+        data = buffer.read()
+        with _export_cache_lock:
+            _export_cache[key] = data
+            _export_cache.move_to_end(key)
+            while len(_export_cache) > _EXPORT_CACHE_MAX_ENTRIES:
+                _export_cache.popitem(last=False)
+    buffer.seek(0)
+    return buffer
+
+
+# Optional export backends, imported on first use and then cached. A missing
+# package raises the 500 on every call since exceptions are not cached.
+@functools.cache
+def _docx_api():
     try:
         from docx import Document
-        from docx.shared import Inches, Pt
-        from docx.enum.text import WD_ALIGN_PARAGRAPH
+        from docx.shared import Pt
+        from docx.oxml import parse_xml
+        from docx.oxml.ns import nsdecls
     except ImportError:
         raise HTTPException(
             status_code=500, 
             detail="python-docx not installed. Run: uv add python-docx"
         )
+    return Document, Pt, parse_xml, nsdecls
+
+
+@functools.cache
+def _openpyxl_api():
+    try:
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
+        from openpyxl.utils import get_column_letter
+    except ImportError:
+        raise HTTPException(
+            status_code=500,
+            detail="openpyxl not installed. Run: uv add openpyxl"
+        )
+    return Workbook, WriteOnlyCell, Font, PatternFill, Border, Side, Alignment, get_column_letter
+
+
+@functools.cache
+def _fpdf_api():
+    try:
+        from fpdf import FPDF
+    except ImportError:
+        raise HTTPException(
+            status_code=500,
+            detail="fpdf2 not installed. Run: uv add fpdf2"
+        )
+    return FPDF
+
+
+def _docx_run_xml(text: str, props: str = "") -> str:
+    """WordprocessingML for one run, with tabs and breaks as add_run() emits them"""
+    body = (
+        escape(text)
+        .replace('\t', '</w:t><w:tab/><w:t xml:space="preserve">')
+        .replace('\r', '</w:t><w:br/><w:t xml:space="preserve">')
+    )
+    return f'<w:r>{props}<w:t xml:space="preserve">{body}</w:t></w:r>'
+
+
+def markdown_to_docx(content: str) -> IO[bytes]:
+    """Convert markdown to DOCX format"""
+    Document, Pt, parse_xml, nsdecls = _docx_api()
     
     doc = Document()
+    body = doc.element.body
+    bullet_style = doc.styles['List Bullet'].style_id
+    number_style = doc.styles['List Number'].style_id
     
-    # Parse markdown and add to document
-    lines = content.split('\n')
-    i = 0
+    # List items and plain paragraphs are written as raw XML and parsed in
+    # batches; headings and code blocks go through the high-level API, so
+    # the pending batch is flushed before each of those to keep order.
+    pending: list[str] = []
     
-    while i < len(lines):
-        line = lines[i]
+    def flush_pending() -> None:
+        if not pending:
+            return
+        fragment = parse_xml(f'<w:body {nsdecls("w")}>{"".join(pending)}</w:body>')
+        sect_pr = body.sectPr
+        for p in list(fragment):
+            if sect_pr is not None:
+                sect_pr.addprevious(p)
+            else:
+                body.append(p)
+        pending.clear()
+    
+    # Parse markdown and add to document
+    for kind, text in _iter_blocks(content):
+        level = _HEADING_LEVELS.get(kind)
+        if level or kind == 'code':
+            flush_pending()
         
         # Headers
-        if line.startswith('### '):
-            para = doc.add_heading(line[4:], level=3)
-        elif line.startswith('## '):
-            para = doc.add_heading(line[3:], level=2)
-        elif line.startswith('# '):
-            para = doc.add_heading(line[2:], level=1)
+        if level:
+            doc.add_heading(text, level=level)
         
         # Bullet points
-        elif line.strip().startswith('- ') or line.strip().startswith('* '):
-            text = line.strip()[2:]
-            doc.add_paragraph(text, style='List Bullet')
+        elif kind == 'bullet':
+            pending.append(
+                f'<w:p><w:pPr><w:pStyle w:val="{bullet_style}"/></w:pPr>'
+                f'{_docx_run_xml(text)}</w:p>'
+            )
         
         # Numbered lists
-        elif re.match(r'^\d+\.\s', line.strip()):
-            text = re.sub(r'^\d+\.\s', '', line.strip())
-            doc.add_paragraph(text, style='List Number')
+        elif kind == 'numbered':
+            pending.append(
+                f'<w:p><w:pPr><w:pStyle w:val="{number_style}"/></w:pPr>'
+                f'{_docx_run_xml(text)}</w:p>'
+            )
         
         # Code blocks
-        elif line.strip().startswith('```'):
-            # Collect code block content
-            code_lines = []
-            i += 1
-            while i < len(lines) and not lines[i].strip().startswith('```'):
-                code_lines.append(lines[i])
-                i += 1
-            if code_lines:
+        elif kind == 'code':
+            if text is not None:
                 para = doc.add_paragraph()
-                run = para.add_run('\n'.join(code_lines))
+                run = para.add_run(text)
                 run.font.name = 'Courier New'
                 run.font.size = Pt(10)
         
         # Regular paragraphs (skip empty lines)
-        elif line.strip():
-            # Handle bold and italic
-            text = line
-            para = doc.add_paragraph()
-            
+        elif kind == 'text':
             # Simple bold/italic handling
-            parts = re.split(r'(\*\*.*?\*\*|\*.*?\*)', text)
-            for part in parts:
+            runs = []
+            for part in _RE_BOLD_ITALIC.split(text):
                 if part.startswith('**') and part.endswith('**'):
-                    run = para.add_run(part[2:-2])
-                    run.bold = True
+                    runs.append(_docx_run_xml(part[2:-2], '<w:rPr><w:b/></w:rPr>'))
                 elif part.startswith('*') and part.endswith('*'):
-                    run = para.add_run(part[1:-1])
-                    run.italic = True
-                else:
-                    para.add_run(part)
-        
-        i += 1
+                    runs.append(_docx_run_xml(part[1:-1], '<w:rPr><w:i/></w:rPr>'))
+                elif part:
+                    runs.append(_docx_run_xml(part))
+            pending.append(f'<w:p>{"".join(runs)}</w:p>')
+    
+    flush_pending()
     
-    # Save to bytes
-    buffer = io.BytesIO()
+    # Save to a spooled buffer
+    buffer = _spooled_buffer()
     doc.save(buffer)
     buffer.seek(0)
     return buffer
 
 
-def markdown_to_xlsx(content: str) -> io.BytesIO:
+def markdown_to_xlsx(content: str) -> IO[bytes]:
     """
     Convert markdown tables to XLSX format.
     
     Extracts tables from markdown and creates Excel sheets.
     Non-table content is placed in a "Content" sheet.
     """
-    try:
-        from openpyxl import Workbook
-        from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
-    except ImportError:
-        raise HTTPException(
-            status_code=500,
-            detail="openpyxl not installed. Run: uv add openpyxl"
-        )
+    Workbook, WriteOnlyCell, Font, PatternFill, Border, Side, Alignment, get_column_letter = _openpyxl_api()
     
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Content"
+    # Write-only mode streams rows out instead of keeping a cell object per
+    # cell, so column widths have to be set before a sheet's first row.
+    wb = Workbook(write_only=True)
+    content_ws = None  # "Content" sheet, created on first use
     
     # Style definitions
     header_font = Font(bold=True)
     header_fill = PatternFill(start_color="DAEEF3", end_color="DAEEF3", fill_type="solid")
+    header_alignment = Alignment(horizontal='center')
     thin_border = Border(
         left=Side(style='thin'),
         right=Side(style='thin'),
@@ -151,8 +339,13 @@ def markdown_to_xlsx(content: str) -> io.BytesIO:
         bottom=Side(style='thin')
     )
     
+    def get_content_sheet():
+        nonlocal content_ws
+        if content_ws is None:
+            content_ws = wb.create_sheet("Content", 0)
+        return content_ws
+    
     lines = content.split('\n')
-    row_num = 1
     table_count = 0
     
     i = 0
@@ -160,89 +353,90 @@ def markdown_to_xlsx(content: str) -> io.BytesIO:
         line = lines[i]
         
         # Detect markdown table
-        if '|' in line and i + 1 < len(lines) and re.match(r'^[\|\-\s:]+$', lines[i + 1]):
+        if '|' in line and i + 1 < len(lines) and _RE_TABLE_SEP.match(lines[i + 1]):
             table_count += 1
             
-            # Create new sheet for table
-            if table_count > 1 or row_num > 1:
+            # A leading table goes on the Content sheet; later ones get their own
+            if table_count == 1 and content_ws is None:
+                ws = get_content_sheet()
+            else:
                 ws = wb.create_sheet(title=f"Table {table_count}")
             
             # Parse header
-            headers = [cell.strip() for cell in line.split('|') if cell.strip()]
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col, value=header)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.border = thin_border
-                cell.alignment = Alignment(horizontal='center')
+            headers = [cell for cell in (c.strip() for c in line.split('|')) if cell]
+            widths = [len(header) for header in headers]
             
             # Skip separator line
             i += 2
-            table_row = 2
             
-            # Parse data rows
+            # Parse data rows, tracking column widths as we go
+            rows = []
             while i < len(lines) and '|' in lines[i]:
-                cells = [cell.strip() for cell in lines[i].split('|') if cell.strip()]
-                for col, value in enumerate(cells, 1):
-                    cell = ws.cell(row=table_row, column=col, value=value)
-                    cell.border = thin_border
-                table_row += 1
+                cells = [cell for cell in (c.strip() for c in lines[i].split('|')) if cell]
+                for col, value in enumerate(cells[:len(widths)]):
+                    widths[col] = max(widths[col], len(value))
+                rows.append(cells)
                 i += 1
             
             # Auto-adjust column widths
-            for col in range(1, len(headers) + 1):
-                max_length = 0
-                column_letter = ws.cell(row=1, column=col).column_letter
-                for row in range(1, table_row):
-                    cell_value = str(ws.cell(row=row, column=col).value or "")
-                    max_length = max(max_length, len(cell_value))
-                ws.column_dimensions[column_letter].width = min(max_length + 2, 50)
+            for col, max_length in enumerate(widths, 1):
+                ws.column_dimensions[get_column_letter(col)].width = min(max_length + 2, 50)
+            
+            header_cells = []
+            for header in headers:
+                cell = WriteOnlyCell(ws, value=header)
+                cell.font = header_font
+                cell.fill = header_fill
+                cell.border = thin_border
+                cell.alignment = header_alignment
+                header_cells.append(cell)
+            ws.append(header_cells)
+            
+            for cells in rows:
+                row_cells = []
+                for value in cells:
+                    cell = WriteOnlyCell(ws, value=value)
+                    cell.border = thin_border
+                    row_cells.append(cell)
+                ws.append(row_cells)
             
             continue
         
-        # Non-table content goes to first sheet
+        # Non-table content goes to the Content sheet
         if line.strip():
-            # Reset to first sheet if we're adding non-table content after tables
-            if table_count > 0 and ws.title != "Content":
-                ws = wb["Content"]
+            ws = get_content_sheet()
             
             # Add text content
             if line.startswith('#'):
                 # Header - make it bold
-                level = len(re.match(r'^#+', line).group())
-                text = line.lstrip('#').strip()
-                cell = ws.cell(row=row_num, column=1, value=text)
+                text = line.lstrip('#')
+                level = len(line) - len(text)
+                cell = WriteOnlyCell(ws, value=text.strip())
                 cell.font = Font(bold=True, size=14 - level)
+                ws.append([cell])
             else:
-                ws.cell(row=row_num, column=1, value=line)
-            row_num += 1
+                ws.append([line])
         
         i += 1
     
-    # Remove empty Content sheet if we only have tables
-    if table_count > 0 and wb["Content"].max_row == 1 and not wb["Content"].cell(1, 1).value:
-        del wb["Content"]
+    # A workbook needs at least one sheet, even for empty content
+    if not wb.worksheets:
+        get_content_sheet()
     
-    # Save to bytes
-    buffer = io.BytesIO()
+    # Save to a spooled buffer
+    buffer = _spooled_buffer()
     wb.save(buffer)
     buffer.seek(0)
     return buffer
 
 
-def markdown_to_pdf(content: str) -> io.BytesIO:
+def markdown_to_pdf(content: str) -> IO[bytes]:
     """
     Convert markdown to PDF format using fpdf2.
     
     Uses fpdf2 which is pure Python and doesn't require system dependencies.
     """
-    try:
-        from fpdf import FPDF
-    except ImportError:
-        raise HTTPException(
-            status_code=500,
-            detail="fpdf2 not installed. Run: uv add fpdf2"
-        )
+    FPDF = _fpdf_api()
     
     pdf = FPDF()
     pdf.add_page()
@@ -256,60 +450,41 @@ def markdown_to_pdf(content: str) -> io.BytesIO:
     # Calculate effective width
     effective_width = pdf.w - pdf.l_margin - pdf.r_margin
     
-    def safe_text(text: str) -> str:
-        """Encode text safely for PDF, replacing unsupported characters."""
-        # Replace common unicode characters with ASCII equivalents
-        replacements = {
-            '"': '"', '"': '"', ''': "'", ''': "'",
-            '–': '-', '—': '-', '…': '...', '•': '*',
-            '→': '->', '←': '<-', '↔': '<->',
-            '✓': '[x]', '✗': '[ ]', '✔': '[x]',
-        }
-        for old, new in replacements.items():
-            text = text.replace(old, new)
-        # Encode to latin-1, replacing unknown chars
-        return text.encode('latin-1', errors='replace').decode('latin-1')
-    
-    lines = content.split('\n')
-    
-    for line in lines:
-        if not line.strip():
+    for line, kind, text in _tokenize(content):
+        if kind == 'blank':
             pdf.ln(5)
             continue
         
         # Headers
-        if line.startswith('### '):
-            pdf.set_font("Helvetica", 'B', 12)
-            pdf.multi_cell(effective_width, 7, safe_text(line[4:]))
-            pdf.set_font("Helvetica", size=11)
-        elif line.startswith('## '):
-            pdf.set_font("Helvetica", 'B', 14)
-            pdf.multi_cell(effective_width, 8, safe_text(line[3:]))
-            pdf.set_font("Helvetica", size=11)
-        elif line.startswith('# '):
-            pdf.set_font("Helvetica", 'B', 16)
-            pdf.multi_cell(effective_width, 10, safe_text(line[2:]))
+        heading = _PDF_HEADING_STYLES.get(kind)
+        if heading:
+            font_size, line_height = heading
+            pdf.set_font("Helvetica", 'B', font_size)
+            pdf.multi_cell(effective_width, line_height, _pdf_safe_text(text))
             pdf.set_font("Helvetica", size=11)
         
         # Bullet points
-        elif line.strip().startswith('- ') or line.strip().startswith('* '):
-            text = "  * " + line.strip()[2:]
-            pdf.multi_cell(effective_width, 6, safe_text(text))
+        elif kind == 'bullet':
+            pdf.multi_cell(effective_width, 6, _pdf_safe_text("  * " + text))
         
         # Numbered lists
-        elif re.match(r'^\d+\.\s', line.strip()):
-            pdf.multi_cell(effective_width, 6, safe_text("  " + line.strip()))
+        elif kind == 'numbered':
+            pdf.multi_cell(effective_width, 6, _pdf_safe_text("  " + line.strip()))
         
-        # Regular text
+        # Regular text (code fences are printed as-is)
         else:
             # Remove markdown formatting for PDF
-            text = re.sub(r'\*\*(.*?)\*\*', r'\1', line)  # Bold
-            text = re.sub(r'\*(.*?)\*', r'\1', text)      # Italic
-            text = re.sub(r'`(.*?)`', r'\1', text)        # Code
-            pdf.multi_cell(effective_width, 6, safe_text(text))
+            # Most lines carry no markers, so skip the passes that cannot match
+            text = line
+            if '*' in text:
+                text = _RE_BOLD.sub(r'\1', text)    # Bold
+                text = _RE_ITALIC.sub(r'\1', text)  # Italic
+            if '`' in text:
+                text = _RE_CODE.sub(r'\1', text)    # Code
+            pdf.multi_cell(effective_width, 6, _pdf_safe_text(text))
     
-    # Save to bytes
-    buffer = io.BytesIO()
+    # Save to a spooled buffer
+    buffer = _spooled_buffer()
     pdf.output(buffer)
     buffer.seek(0)
     return buffer
@@ -330,17 +505,17 @@ def export_content(request: ExportRequest):
     filename = sanitize_filename(request.filename)
     
     if request.format == "docx":
-        buffer = markdown_to_docx(request.content)
+        buffer = _render_cached(request.content, "docx", markdown_to_docx)
         media_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
         ext = "docx"
     
     elif request.format == "pdf":
-        buffer = markdown_to_pdf(request.content)
+        buffer = _render_cached(request.content, "pdf", markdown_to_pdf)
         media_type = "application/pdf"
         ext = "pdf"
     
     elif request.format == "xlsx":
-        buffer = markdown_to_xlsx(request.content)
+        buffer = _render_cached(request.content, "xlsx", markdown_to_xlsx)
         media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         ext = "xlsx"
     
@@ -348,7 +523,7 @@ def export_content(request: ExportRequest):
         raise HTTPException(status_code=400, detail=f"Unsupported format: {request.format}")
     
     return StreamingResponse(
-        buffer,
+        _iter_chunks(buffer),
         media_type=media_type,
         headers={
             "Content-Disposition": f'attachment; filename="{filename}.{ext}"'
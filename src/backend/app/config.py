@@ -27,7 +27,11 @@ class Settings(BaseSettings):
     # Safety controls
     allow_unauthenticated_conversation_delete: bool = False
 
-    
+    # Artifact downloads: hand file transfer to nginx via X-Accel-Redirect.
+    # Requires an `internal` nginx location aliased to the artifacts directory.
+    use_x_accel: bool = False
+    x_accel_artifacts_prefix: str = "/_protected_artifacts"
+
     
     # Firestore (stub for future)
     firestore_project_id: Optional[str] = None
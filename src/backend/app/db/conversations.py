@@ -5,18 +5,55 @@ SQLite-based storage for session-based conversations.
 Stores conversations and messages with artifact references.
 """
 
-import json
+import secrets
 import sqlite3
-import uuid
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, List, Tuple
+from typing import Iterator, Optional, List, Tuple
 from dataclasses import dataclass
 from pathlib import Path
 import threading
 
+import orjson
+
 from app.config import settings
 from app.paths import BACKEND_ROOT
 
+# Positive conversation_exists() results are reused for this long, so an artifact
+# listing followed by N downloads costs one lookup instead of N+1.
+_EXISTS_CACHE_TTL_S = 30.0
+_EXISTS_CACHE_MAX_ENTRIES = 10_000
+
+# Preview of a conversation's newest message; the same ordering as history
+# reads, so an out-of-order insert (a turn's earlier user message) is handled.
+_LAST_PREVIEW_SQL = """
+    SELECT SUBSTR(content, 1, 100) FROM messages
+    WHERE conversation_id = {conversation_id}
+    ORDER BY timestamp DESC, id DESC
+    LIMIT 1
+"""
+
+_INSERT_MESSAGE_SQL = (
+    "INSERT INTO messages (conversation_id, role, content, artifacts, timestamp) VALUES (?, ?, ?, ?, ?)"
+)
+
+# Applied to every new connection
+_CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA mmap_size = 268435456",  # 256 MB
+    "PRAGMA cache_size = -65536",  # 64 MB
+)
+
+
+def _dump_artifacts(artifacts: Optional[List[dict]]) -> Optional[str]:
+    """Serialize artifact references for the TEXT column (None when empty)."""
+    if not artifacts:
+        return None
+    return orjson.dumps(artifacts, option=orjson.OPT_NON_STR_KEYS).decode()
+
 
 def _resolve_db_path() -> Path:
     """Resolve DB path from settings, supporting absolute or backend-root-relative paths."""
@@ -48,6 +85,16 @@ class ConversationSummary:
     updated_at: str
 
 
+@dataclass
+class ArtifactRecord:
+    """Indexed metadata for a generated artifact file"""
+    conversation_id: str
+    filename: str
+    type: str
+    size_bytes: Optional[int]
+    created_at: float  # Unix timestamp
+
+
 @dataclass
 class Conversation:
     """Full conversation with messages"""
@@ -68,6 +115,12 @@ class ConversationDB:
         self.db_path = _resolve_db_path()
         # Ensure data directory exists
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # conversation_id -> monotonic time it was last confirmed to exist
+        self._exists_cache: dict[str, float] = {}
+        self._exists_cache_lock = threading.Lock()
+        # Bumped after every commit so readers can tell cached results are stale
+        self._write_generation = 0
+        self._write_generation_lock = threading.Lock()
         self._init_db()
     
     def _get_connection(self) -> sqlite3.Connection:
@@ -77,8 +130,52 @@ class ConversationDB:
             self._local.connection.row_factory = sqlite3.Row
             # Enforce referential integrity for cascading deletes and consistency.
             self._local.connection.execute("PRAGMA foreign_keys = ON")
+            # WAL lets readers run alongside the writer; with synchronous=NORMAL
+            # a commit no longer fsyncs (only checkpoints do).
+            for pragma in _CONNECTION_PRAGMAS:
+                self._local.connection.execute(pragma)
         return self._local.connection
     
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Group writes on this thread into a single transaction.
+        
+        Mutating methods called inside skip their own commit; the batch commits
+        once on exit, or rolls everything back if the block raises. Nested
+        batches join the outermost one.
+        """
+        if getattr(self._local, 'in_batch', False):
+            yield
+            return
+        conn = self._get_connection()
+        self._local.in_batch = True
+        try:
+            with conn:
+                yield
+        finally:
+            self._local.in_batch = False
+            self._bump_write_generation()
+    
+    @property
+    def write_generation(self) -> int:
+        """Counter that changes whenever this process commits a write."""
+        return self._write_generation
+    
+    def _bump_write_generation(self) -> None:
+        with self._write_generation_lock:
+            self._write_generation += 1
+    
+    def _commit(self, conn: sqlite3.Connection) -> None:
+        if not getattr(self._local, 'in_batch', False):
+            conn.commit()
+            self._bump_write_generation()
+    
+    def _rollback(self, conn: sqlite3.Connection) -> None:
+        # Inside a batch the failure propagates and the batch rolls back
+        if not getattr(self._local, 'in_batch', False):
+            conn.rollback()
+    
     def _init_db(self):
         """Initialize database tables if they don't exist"""
         conn = self._get_connection()
@@ -108,11 +205,76 @@ class ConversationDB:
             )
         """)
         
-        # Create indexes for performance
+        # Listing summary columns, kept current by the message triggers below
+        cursor.execute("SELECT name FROM pragma_table_info('conversations')")
+        conversation_columns = {row["name"] for row in cursor.fetchall()}
+        if "message_count" not in conversation_columns:
+            cursor.execute("ALTER TABLE conversations ADD COLUMN message_count INTEGER NOT NULL DEFAULT 0")
+            cursor.execute("ALTER TABLE conversations ADD COLUMN last_preview TEXT")
+            cursor.execute(f"""
+                UPDATE conversations SET
+                    message_count = (SELECT COUNT(*) FROM messages m WHERE m.conversation_id = conversations.id),
+                    last_preview = ({_LAST_PREVIEW_SQL.format(conversation_id="conversations.id")})
+            """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_messages_insert_summary
+            AFTER INSERT ON messages
+            BEGIN
+                UPDATE conversations SET
+                    message_count = message_count + 1,
+                    last_preview = ({_LAST_PREVIEW_SQL.format(conversation_id="NEW.conversation_id")})
+                WHERE id = NEW.conversation_id;
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_messages_delete_summary
+            AFTER DELETE ON messages
+            BEGIN
+                UPDATE conversations SET
+                    message_count = message_count - 1,
+                    last_preview = ({_LAST_PREVIEW_SQL.format(conversation_id="OLD.conversation_id")})
+                WHERE id = OLD.conversation_id;
+            END
+        """)
+        
+        # Artifact metadata index (files on disk stay the source of truth for bytes).
+        # Lets the cross-conversation artifact listing read the newest N rows
+        # instead of walking and stat()-ing every artifact directory.
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'artifacts'")
+        artifacts_table_existed = cursor.fetchone() is not None
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_messages_conversation_id 
-            ON messages(conversation_id)
+            CREATE TABLE IF NOT EXISTS artifacts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                conversation_id TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                type TEXT,
+                size_bytes INTEGER,
+                created_at REAL NOT NULL,
+                UNIQUE (conversation_id, filename),
+                FOREIGN KEY (conversation_id) REFERENCES conversations(id) ON DELETE CASCADE
+            )
         """)
+        if not artifacts_table_existed:
+            # Backfill from the artifact references already stored on messages
+            cursor.execute("""
+                INSERT OR IGNORE INTO artifacts (conversation_id, filename, type, size_bytes, created_at)
+                SELECT
+                    m.conversation_id,
+                    json_extract(a.value, '$.filename'),
+                    json_extract(a.value, '$.type'),
+                    json_extract(a.value, '$.size_bytes'),
+                    (julianday(m.timestamp) - 2440587.5) * 86400.0
+                FROM messages m
+                JOIN conversations c ON c.id = m.conversation_id,
+                json_each(CASE WHEN json_valid(m.artifacts) THEN m.artifacts ELSE '[]' END) a
+                WHERE m.artifacts IS NOT NULL
+                  AND json_extract(a.value, '$.filename') IS NOT NULL
+            """)
+        
+        # Create indexes for performance. The composite messages index serves
+        # conversation_id lookups and FK cascades on its own, so the older
+        # single-column index only cost an extra b-tree write per insert.
+        cursor.execute("DROP INDEX IF EXISTS idx_messages_conversation_id")
         cursor.execute("""
             CREATE INDEX IF NOT EXISTS idx_messages_conversation_timestamp
             ON messages(conversation_id, timestamp DESC, id DESC)
@@ -121,6 +283,10 @@ class ConversationDB:
             CREATE INDEX IF NOT EXISTS idx_conversations_updated_at 
             ON conversations(updated_at DESC)
         """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_artifacts_created_at
+            ON artifacts(created_at DESC)
+        """)
         
         conn.commit()
     
@@ -133,9 +299,9 @@ class ConversationDB:
             first_message: First user message, used for title if title not provided
             
         Returns:
-            Conversation ID (UUID format)
+            Conversation ID (32 random hex chars)
         """
-        conv_id = str(uuid.uuid4())
+        conv_id = secrets.token_hex(16)
         now = datetime.utcnow().isoformat()
         
         # Use first message as title (truncated) if no title provided
@@ -148,7 +314,8 @@ class ConversationDB:
             "INSERT INTO conversations (id, title, created_at, updated_at) VALUES (?, ?, ?, ?)",
             (conv_id, title, now, now)
         )
-        conn.commit()
+        self._commit(conn)
+        self._remember_exists(conv_id)
         
         return conv_id
     
@@ -167,77 +334,50 @@ class ConversationDB:
         
         Returns list of ConversationSummary with preview from last message.
         
-        Optimized: Uses JOINs with window functions instead of N+1 queries.
-        Previously made 1 + 2*N queries (101 queries for 50 conversations).
-        Now makes only 2 queries total regardless of page size.
+        One query over idx_conversations_updated_at: message_count and
+        last_preview are maintained on the row by triggers on messages, and
+        the total rides along as an uncorrelated subquery that SQLite
+        evaluates once.
         """
         conn = self._get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = None  # plain tuples on this hot path
         
-        # Get total count (1 query)
-        cursor.execute("SELECT COUNT(*) FROM conversations")
-        total = cursor.fetchone()[0]
-        
-        if total == 0:
-            return [], 0
-        
-        # Get conversations with message count and preview using only paged conversation ids.
-        # This avoids scanning/partitioning all messages for every request.
         cursor.execute("""
-            WITH paged_conversations AS (
-                SELECT id, title, created_at, updated_at
-                FROM conversations
-                ORDER BY updated_at DESC
-                LIMIT ? OFFSET ?
-            ),
-            message_counts AS (
-                SELECT m.conversation_id, COUNT(*) as message_count
-                FROM messages m
-                JOIN paged_conversations p ON p.id = m.conversation_id
-                GROUP BY m.conversation_id
-            ),
-            latest_messages AS (
-                SELECT
-                    m.conversation_id,
-                    SUBSTR(m.content, 1, 100) as preview,
-                    ROW_NUMBER() OVER (
-                        PARTITION BY m.conversation_id
-                        ORDER BY m.timestamp DESC, m.id DESC
-                    ) as rn
-                FROM messages m
-                JOIN paged_conversations p ON p.id = m.conversation_id
-            )
             SELECT
-                p.id,
-                p.title,
-                p.created_at,
-                p.updated_at,
-                COALESCE(mc.message_count, 0) as message_count,
-                lm.preview
-            FROM paged_conversations p
-            LEFT JOIN message_counts mc ON mc.conversation_id = p.id
-            LEFT JOIN (
-                SELECT conversation_id, preview
-                FROM latest_messages
-                WHERE rn = 1
-            ) lm ON lm.conversation_id = p.id
-            ORDER BY p.updated_at DESC
+                c.id,
+                c.title,
+                c.created_at,
+                c.updated_at,
+                c.message_count,
+                c.last_preview as preview,
+                (SELECT COUNT(*) FROM conversations) as total
+            FROM conversations c
+            ORDER BY c.updated_at DESC
+            LIMIT ? OFFSET ?
         """, (limit, offset))
         
         rows = cursor.fetchall()
         
         summaries = [
             ConversationSummary(
-                id=row["id"],
-                title=row["title"],
-                preview=row["preview"] or "",
-                message_count=row["message_count"],
-                created_at=row["created_at"],
-                updated_at=row["updated_at"]
+                id=conv_id,
+                title=title,
+                preview=preview or "",
+                message_count=message_count,
+                created_at=created_at,
+                updated_at=updated_at
             )
-            for row in rows
+            for conv_id, title, created_at, updated_at, message_count, preview, _ in rows
         ]
         
+        if rows:
+            total = rows[0][-1]
+        else:
+            # Empty page: either no conversations or an offset past the end
+            cursor.execute("SELECT COUNT(*) FROM conversations")
+            total = cursor.fetchone()[0]
+        
         return summaries, total
     
     def get_conversation(self, conversation_id: str) -> Optional[Conversation]:
@@ -248,43 +388,69 @@ class ConversationDB:
         """
         conn = self._get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = None  # plain tuples: one row per message, read positionally
         
-        # Get conversation
-        cursor.execute("SELECT * FROM conversations WHERE id = ?", (conversation_id,))
-        conv_row = cursor.fetchone()
-        
-        if not conv_row:
-            return None
-        
-        # Get messages
+        # Header and messages in one query; the LEFT JOIN keeps one all-NULL
+        # message row for an existing, empty conversation
         cursor.execute("""
-            SELECT * FROM messages 
-            WHERE conversation_id = ? 
-            ORDER BY timestamp ASC
+            SELECT c.title, c.created_at, c.updated_at, c.is_shared,
+                   m.id, m.role, m.content, m.artifacts, m.timestamp
+            FROM conversations c
+            LEFT JOIN messages m ON m.conversation_id = c.id
+            WHERE c.id = ?
+            ORDER BY m.timestamp ASC
         """, (conversation_id,))
-        msg_rows = cursor.fetchall()
+        rows = cursor.fetchall()
+        
+        if not rows:
+            return None
         
         messages = [
             Message(
-                id=row["id"],
-                conversation_id=row["conversation_id"],
-                role=row["role"],
-                content=row["content"],
-                artifacts=json.loads(row["artifacts"]) if row["artifacts"] else None,
-                timestamp=row["timestamp"]
+                id=msg_id,
+                conversation_id=conversation_id,
+                role=role,
+                content=content,
+                artifacts=orjson.loads(artifacts) if artifacts else None,
+                timestamp=timestamp
             )
-            for row in msg_rows
+            for _, _, _, _, msg_id, role, content, artifacts, timestamp in rows
+            if msg_id is not None
         ]
         
+        title, created_at, updated_at, is_shared = rows[0][:4]
         return Conversation(
-            id=conv_row["id"],
-            title=conv_row["title"],
+            id=conversation_id,
+            title=title,
             messages=messages,
-            created_at=conv_row["created_at"],
-            updated_at=conv_row["updated_at"],
-            is_shared=bool(conv_row["is_shared"])
+            created_at=created_at,
+            updated_at=updated_at,
+            is_shared=bool(is_shared)
         )
     
+    def get_conversation_version(self, conversation_id: str) -> Optional[str]:
+        """
+        Get a cheap change token for a conversation, for HTTP validators.
+        
+        Covers updated_at plus what can change without bumping it: the newest
+        message id (user-only turns), the title and the share flag.
+        Returns None if conversation doesn't exist.
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT c.updated_at, c.title, c.is_shared,
+                   (SELECT MAX(id) FROM messages WHERE conversation_id = c.id) AS last_message_id
+            FROM conversations c
+            WHERE c.id = ?
+        """, (conversation_id,))
+        row = cursor.fetchone()
+        
+        if not row:
+            return None
+        return f"{row['updated_at']}|{row['last_message_id']}|{row['is_shared']}|{row['title']}"
+    
     def delete_conversation(self, conversation_id: str) -> bool:
         """
         Delete a conversation and all its messages.
@@ -294,19 +460,16 @@ class ConversationDB:
         conn = self._get_connection()
         cursor = conn.cursor()
         
-        # Check if exists
-        cursor.execute("SELECT id FROM conversations WHERE id = ?", (conversation_id,))
-        if not cursor.fetchone():
-            return False
-        
-        # Delete messages first
-        cursor.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
-        
-        # Delete conversation
+        # Messages and artifact rows go with it via ON DELETE CASCADE
         cursor.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,))
+        self._commit(conn)
         
-        conn.commit()
-        return True
+        # Only after the commit: a concurrent conversation_exists() before it
+        # still sees the row and would re-cache it for the full TTL
+        with self._exists_cache_lock:
+            self._exists_cache.pop(conversation_id, None)
+        
+        return cursor.rowcount > 0
     
     def add_message(
         self,
@@ -333,8 +496,8 @@ class ConversationDB:
         now = datetime.utcnow().isoformat()
         
         cursor.execute(
-            "INSERT INTO messages (conversation_id, role, content, artifacts, timestamp) VALUES (?, ?, ?, ?, ?)",
-            (conversation_id, role, content, json.dumps(artifacts) if artifacts else None, now)
+            _INSERT_MESSAGE_SQL,
+            (conversation_id, role, content, _dump_artifacts(artifacts), now)
         )
         message_id = cursor.lastrowid
         
@@ -345,9 +508,86 @@ class ConversationDB:
                 (now, conversation_id)
             )
         
-        conn.commit()
+        self._commit(conn)
         return message_id
     
+    def add_turn(
+        self,
+        conversation_id: str,
+        user_content: str,
+        user_timestamp: str,
+        assistant_content: Optional[str] = None,
+        artifacts: Optional[List[dict]] = None,
+    ) -> None:
+        """
+        Persist a chat turn (user message + assistant reply) in one transaction.
+        
+        Without assistant_content (failed or abandoned run) only the user message
+        is written and the conversation's updated_at is left unchanged.
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        rows = [(conversation_id, "user", user_content, None, user_timestamp)]
+        now = None
+        if assistant_content is not None:
+            now = datetime.utcnow().isoformat()
+            rows.append(
+                (conversation_id, "assistant", assistant_content, _dump_artifacts(artifacts), now)
+            )
+        
+        try:
+            cursor.executemany(_INSERT_MESSAGE_SQL, rows)
+            if now is not None:
+                cursor.execute(
+                    "UPDATE conversations SET updated_at = ? WHERE id = ?",
+                    (now, conversation_id)
+                )
+            self._commit(conn)
+        except Exception:
+            # Leave no half-written turn open on this thread's connection
+            self._rollback(conn)
+            raise
+    
+    def add_messages(
+        self,
+        conversation_id: str,
+        messages: List[Tuple[str, str, Optional[List[dict]]]],
+        update_conversation_updated_at: bool = True,
+    ) -> None:
+        """
+        Add several messages to a conversation in one transaction.
+        
+        Args:
+            conversation_id: The conversation to add to
+            messages: (role, content, artifacts) tuples, oldest first
+            update_conversation_updated_at: Bump the conversation's updated_at
+        """
+        if not messages:
+            return
+        
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        now = datetime.utcnow().isoformat()
+        
+        try:
+            cursor.executemany(
+                _INSERT_MESSAGE_SQL,
+                [
+                    (conversation_id, role, content, _dump_artifacts(artifacts), now)
+                    for role, content, artifacts in messages
+                ]
+            )
+            if update_conversation_updated_at:
+                cursor.execute(
+                    "UPDATE conversations SET updated_at = ? WHERE id = ?",
+                    (now, conversation_id)
+                )
+            self._commit(conn)
+        except Exception:
+            self._rollback(conn)
+            raise
+    
     def update_message_artifacts(self, message_id: int, artifacts: List[dict]) -> bool:
         """
         Update artifacts for a message.
@@ -359,19 +599,118 @@ class ConversationDB:
         
         cursor.execute(
             "UPDATE messages SET artifacts = ? WHERE id = ?",
-            (json.dumps(artifacts), message_id)
+            (orjson.dumps(artifacts, option=orjson.OPT_NON_STR_KEYS).decode(), message_id)
         )
-        conn.commit()
+        self._commit(conn)
         
         return cursor.rowcount > 0
     
+    def add_artifact(
+        self,
+        conversation_id: str,
+        filename: str,
+        artifact_type: str,
+        size_bytes: Optional[int],
+        created_at: Optional[float] = None,
+    ) -> None:
+        """
+        Record (or refresh) an artifact's metadata when it is generated.
+        
+        A file regenerated under the same name replaces the earlier row.
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            """
+            INSERT INTO artifacts (conversation_id, filename, type, size_bytes, created_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (conversation_id, filename) DO UPDATE SET
+                type = excluded.type,
+                size_bytes = excluded.size_bytes,
+                created_at = excluded.created_at
+            """,
+            (conversation_id, filename, artifact_type, size_bytes,
+             created_at if created_at is not None else time.time())
+        )
+        self._commit(conn)
+    
+    def top_artifacts(self, limit: int = 50) -> List[ArtifactRecord]:
+        """Newest artifacts across all conversations."""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT conversation_id, filename, type, size_bytes, created_at
+            FROM artifacts
+            ORDER BY created_at DESC
+            LIMIT ?
+        """, (max(limit, 0),))
+        
+        return [
+            ArtifactRecord(
+                conversation_id=row["conversation_id"],
+                filename=row["filename"],
+                type=row["type"],
+                size_bytes=row["size_bytes"],
+                created_at=row["created_at"]
+            )
+            for row in cursor.fetchall()
+        ]
+    
     def conversation_exists(self, conversation_id: str) -> bool:
-        """Check if a conversation exists"""
+        """Check if a conversation exists (positive results cached for a short TTL)"""
+        checked_at = self._exists_cache.get(conversation_id)
+        if checked_at is not None and time.monotonic() - checked_at < _EXISTS_CACHE_TTL_S:
+            return True
+        
         conn = self._get_connection()
         cursor = conn.cursor()
         
         cursor.execute("SELECT id FROM conversations WHERE id = ?", (conversation_id,))
-        return cursor.fetchone() is not None
+        exists = cursor.fetchone() is not None
+        if exists:
+            self._remember_exists(conversation_id)
+        return exists
+    
+    def _remember_exists(self, conversation_id: str) -> None:
+        now = time.monotonic()
+        with self._exists_cache_lock:
+            self._exists_cache[conversation_id] = now
+            if len(self._exists_cache) > _EXISTS_CACHE_MAX_ENTRIES:
+                # Drop expired entries; if everything is fresh, start over.
+                self._exists_cache = {
+                    cid: t for cid, t in self._exists_cache.items()
+                    if now - t < _EXISTS_CACHE_TTL_S
+                }
+                if len(self._exists_cache) > _EXISTS_CACHE_MAX_ENTRIES:
+                    self._exists_cache = {conversation_id: now}
+    
+    def begin_turn(self, conversation_id: str) -> Optional[List[dict]]:
+        """
+        Check a conversation exists and fetch its model history in one query.
+        
+        Returns the get_conversation_history() list, or None if the
+        conversation doesn't exist. The user message itself is written later
+        by add_turn().
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        
+        # LEFT JOIN keeps one all-NULL message row for an existing, empty conversation
+        cursor.execute("""
+            SELECT m.role, m.content FROM conversations c
+            LEFT JOIN messages m ON m.conversation_id = c.id
+            WHERE c.id = ?
+            ORDER BY m.timestamp ASC
+        """, (conversation_id,))
+        rows = cursor.fetchall()
+        
+        if not rows:
+            return None
+        self._remember_exists(conversation_id)
+        return [{"role": role, "content": content} for role, content in rows if role is not None]
     
     def get_conversation_history(self, conversation_id: str) -> List[dict]:
         """
@@ -381,6 +720,7 @@ class ConversationDB:
         """
         conn = self._get_connection()
         cursor = conn.cursor()
+        cursor.row_factory = None
         
         cursor.execute("""
             SELECT role, content FROM messages 
@@ -388,7 +728,7 @@ class ConversationDB:
             ORDER BY timestamp ASC
         """, (conversation_id,))
         
-        return [{"role": row["role"], "content": row["content"]} for row in cursor.fetchall()]
+        return [{"role": role, "content": content} for role, content in cursor.fetchall()]
     
     def set_conversation_shared(self, conversation_id: str, is_shared: bool) -> bool:
         """Set the is_shared flag for a conversation"""
@@ -399,7 +739,7 @@ class ConversationDB:
             "UPDATE conversations SET is_shared = ? WHERE id = ?",
             (1 if is_shared else 0, conversation_id)
         )
-        conn.commit()
+        self._commit(conn)
         
         return cursor.rowcount > 0
     
@@ -412,7 +752,7 @@ class ConversationDB:
             "UPDATE conversations SET title = ? WHERE id = ?",
             (title, conversation_id)
         )
-        conn.commit()
+        self._commit(conn)
         
         return cursor.rowcount > 0
 
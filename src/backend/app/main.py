@@ -15,6 +15,8 @@ Endpoints:
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
 from contextlib import asynccontextmanager
 
 from app.config import settings
@@ -40,6 +42,27 @@ async def lifespan(app: FastAPI):
     print("👋 Shutting down gracefully")
 
 
+class PathGZipMiddleware:
+    """
+    GZip responses only under the given path prefixes.
+
+    The conversation JSON payloads compress well; the SSE chat stream must stay
+    uncompressed and artifact/export downloads are already-compressed binaries
+    (and may use the zero-copy send extension, which GZipMiddleware can't pass).
+    """
+
+    def __init__(self, app: ASGIApp, prefixes: tuple[str, ...], minimum_size: int = 1024) -> None:
+        self.app = app
+        self.prefixes = prefixes
+        self.gzip_app = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=6)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"].startswith(self.prefixes):
+            await self.gzip_app(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.app_name,
@@ -71,6 +94,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress conversation JSON (history payloads can be large)
+app.add_middleware(PathGZipMiddleware, prefixes=("/api/conversations",))
+
 # Include routers
 app.include_router(chat.router)
 app.include_router(conversations.router)
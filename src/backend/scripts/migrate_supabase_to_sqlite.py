@@ -11,17 +11,114 @@ Usage:
 
 import os
 import sys
-import json
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+import orjson
 from dotenv import load_dotenv
 load_dotenv(Path(__file__).resolve().parent.parent / ".env")
 
+# Same tuning the app applies to its own connections
+from app.db.conversations import _CONNECTION_PRAGMAS
+
+# Rows requested per Supabase page. PostgREST caps a single response at its
+# configured max-rows (1000 by default, possibly lower), so a page can come back
+# short without being the last one; only an empty page ends a table.
+PAGE_SIZE = 1000
+
+# Fixed insert statements, so sqlite3's statement cache reuses one prepared
+# statement for executemany and for the per-row retry path alike.
+
+# An upsert rather than INSERT OR REPLACE: REPLACE deletes and re-inserts the
+# row, which would reset the trigger-maintained message_count / last_preview
+# when a re-run meets conversations that already have messages.
+INSERT_CONVERSATION_SQL = (
+    "INSERT INTO conversations (id, title, created_at, updated_at, is_shared) "
+    "VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET "
+    "title = excluded.title, created_at = excluded.created_at, "
+    "updated_at = excluded.updated_at, is_shared = excluded.is_shared"
+)
+INSERT_MESSAGE_SQL = (
+    "INSERT INTO messages (conversation_id, role, content, artifacts, timestamp) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+
+
+def _fetch_pages(supabase, table, columns, executor):
+    """Yield columns of a Supabase table PAGE_SIZE rows at a time, ordered by id.
+    
+    The first page is requested immediately. After every non-empty page the
+    next offset is requested in the background while the caller writes the
+    current one; paging ends when that request comes back empty.
+    """
+    def fetch(offset):
+        response = (
+            supabase.table(table)
+            .select(columns)
+            .order("id")
+            .range(offset, offset + PAGE_SIZE - 1)
+            .execute()
+        )
+        return response.data or []
+    
+    def pages(pending):
+        offset = 0
+        while True:
+            rows = pending.result()
+            if not rows:
+                return
+            offset += len(rows)
+            pending = executor.submit(fetch, offset)
+            yield rows
+    
+    return pages(executor.submit(fetch, 0))
+
+
+def _insert_rows(conn, sql, chunks, describe):
+    """Insert chunks of rows inside one transaction, returning the count written.
+    
+    A chunk that fails as a whole is retried row by row so a single bad record
+    is reported and skipped instead of aborting the migration.
+    """
+    inserted = 0
+    conn.execute("BEGIN")
+    for chunk in chunks:
+        conn.execute("SAVEPOINT chunk")
+        try:
+            conn.executemany(sql, chunk)
+            conn.execute("RELEASE chunk")
+            inserted += len(chunk)
+            continue
+        except Exception:
+            conn.execute("ROLLBACK TO chunk")
+            conn.execute("RELEASE chunk")
+        
+        for row in chunk:
+            try:
+                conn.execute(sql, row)
+                inserted += 1
+            except Exception as e:
+                print(f"   ⚠️ Failed to migrate {describe(row)}: {e}")
+    conn.commit()
+    return inserted
+
+
+def _serialize_artifacts(artifacts):
+    """Normalize Supabase artifacts to the JSON text stored in SQLite"""
+    if artifacts and isinstance(artifacts, list):
+        # Stored as TEXT like the app writes it, via the same orjson encoder
+        return orjson.dumps(artifacts, option=orjson.OPT_NON_STR_KEYS).decode()
+    if artifacts and isinstance(artifacts, str):
+        # Already a string, keep as is
+        return artifacts
+    return None
+
 
 def migrate():
     """Migrate data from Supabase to SQLite"""
@@ -53,6 +150,8 @@ def migrate():
     print(f"💾 SQLite database: {db_path}")
     
     conn = sqlite3.connect(str(db_path))
+    for pragma in _CONNECTION_PRAGMAS:
+        conn.execute(pragma)
     cursor = conn.cursor()
     
     # Create tables
@@ -78,30 +177,22 @@ def migrate():
         )
     """)
     
-    # Create indexes
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_messages_conversation_id 
-        ON messages(conversation_id)
-    """)
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_conversations_updated_at 
-        ON conversations(updated_at DESC)
-    """)
-    
     conn.commit()
     
-    # Fetch conversations from Supabase
-    print("📥 Fetching conversations from Supabase...")
-    conv_response = supabase.table("conversations").select("*").execute()
-    conversations = conv_response.data or []
-    print(f"   Found {len(conversations)} conversations")
-    
-    # Migrate conversations
-    migrated_convs = 0
-    for conv in conversations:
-        try:
-            cursor.execute(
-                "INSERT OR REPLACE INTO conversations (id, title, created_at, updated_at, is_shared) VALUES (?, ?, ?, ?, ?)",
+    # Request the first page of both tables at once; later pages are fetched
+    # in the background while the previous page is being written
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        conv_pages = _fetch_pages(
+            supabase, "conversations", "id,title,created_at,updated_at", executor
+        )
+        msg_pages = _fetch_pages(
+            supabase, "messages", "conversation_id,role,content,artifacts,created_at", executor
+        )
+        
+        # Stream conversations from Supabase into SQLite page by page
+        print("📥 Migrating conversations from Supabase...")
+        conv_chunks = (
+            [
                 (
                     conv["id"],
                     conv.get("title", "Untitled"),
@@ -109,47 +200,53 @@ def migrate():
                     conv.get("updated_at"),
                     0  # is_shared defaults to false
                 )
-            )
-            migrated_convs += 1
-        except Exception as e:
-            print(f"   ⚠️ Failed to migrate conversation {conv['id']}: {e}")
-    
-    conn.commit()
-    print(f"   ✅ Migrated {migrated_convs} conversations")
-    
-    # Fetch messages from Supabase
-    print("📥 Fetching messages from Supabase...")
-    msg_response = supabase.table("messages").select("*").execute()
-    messages = msg_response.data or []
-    print(f"   Found {len(messages)} messages")
-    
-    # Migrate messages
-    migrated_msgs = 0
-    for msg in messages:
-        try:
-            # Convert artifacts from JSON if present
-            artifacts = msg.get("artifacts")
-            if artifacts and isinstance(artifacts, list):
-                artifacts = json.dumps(artifacts)
-            elif artifacts and isinstance(artifacts, str):
-                # Already a string, keep as is
-                pass
-            else:
-                artifacts = None
-            
-            cursor.execute(
-                "INSERT INTO messages (conversation_id, role, content, artifacts, timestamp) VALUES (?, ?, ?, ?, ?)",
+                for conv in page
+            ]
+            for page in conv_pages
+        )
+        migrated_convs = _insert_rows(
+            conn,
+            INSERT_CONVERSATION_SQL,
+            conv_chunks,
+            lambda row: f"conversation {row[0]}",
+        )
+        
+        print(f"   ✅ Migrated {migrated_convs} conversations")
+        
+        # Stream messages from Supabase into SQLite page by page
+        print("📥 Migrating messages from Supabase...")
+        msg_chunks = (
+            [
                 (
                     msg["conversation_id"],
                     msg["role"],
                     msg["content"],
-                    artifacts,
+                    _serialize_artifacts(msg.get("artifacts")),
                     msg.get("created_at")  # Map created_at to timestamp
                 )
-            )
-            migrated_msgs += 1
-        except Exception as e:
-            print(f"   ⚠️ Failed to migrate message {msg.get('id')}: {e}")
+                for msg in page
+            ]
+            for page in msg_pages
+        )
+        migrated_msgs = _insert_rows(
+            conn,
+            INSERT_MESSAGE_SQL,
+            msg_chunks,
+            lambda row: f"message in conversation {row[0]}",
+        )
+    
+    # Create indexes once the bulk load is done: one sorted build per index
+    # instead of a B-tree update per inserted row
+    # Same composite index the app builds in ConversationDB._init_db; it also
+    # serves conversation_id lookups, so no single-column index is created
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_messages_conversation_timestamp
+        ON messages(conversation_id, timestamp DESC, id DESC)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_conversations_updated_at 
+        ON conversations(updated_at DESC)
+    """)
     
     conn.commit()
     conn.close()